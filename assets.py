@@ -0,0 +1,45 @@
+import os
+import pygame
+
+
+# one shared surface for every (file, size, color key, alpha) in the game, converted to the display format
+# once; color_key -1 takes the color of the upper left pixel like the old load_image,
+# alpha keeps per-pixel alpha of the file, otherwise the surface is opaque
+class AssetRegistry:
+    def __init__(self, directory='data'):
+        self.directory = directory
+        self.images = dict()
+
+    def image(self, name, size=None, color_key=None, alpha=False):
+        key = (name, None if size is None else tuple(size), color_key, alpha)
+        if key not in self.images:
+            self.images[key] = self.load(name, key[1], color_key, alpha)
+        return self.images[key]
+
+    def load(self, name, size, color_key, alpha):
+        image = pygame.image.load(os.path.join(self.directory, name))
+        image = image.convert_alpha() if alpha else image.convert()
+
+        if color_key == -1:
+            color_key = image.get_at((0, 0))
+
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+
+        # run length encoded color key blits much faster
+        if color_key is not None:
+            image.set_colorkey(color_key, pygame.RLEACCEL)
+
+        return image
+
+    def memory(self):
+        return sum(image.get_width() * image.get_height() * image.get_bytesize() for image in self.images.values())
+
+    def report(self):
+        lines = ['%s %s: %d KB' % (name, size, image.get_width() * image.get_height() * image.get_bytesize() // 1024)
+                 for (name, size, color_key, alpha), image in self.images.items()]
+        lines.append('%d surfaces, %d KB' % (len(self.images), self.memory() // 1024))
+        return '\n'.join(lines)
+
+
+ASSETS = AssetRegistry()
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+# uniform grid over world coordinates: items are sorted by the key of their cell,
+# so every cell is one slice of self.items found with searchsorted
+class SpatialHash:
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.items = np.zeros(0, dtype=int)
+
+    def cell_keys(self, cells_x, cells_y):
+        return (cells_x.astype(np.int64) << 32) + (cells_y.astype(np.int64) + (1 << 31))
+
+    def build(self, positions, items):
+        cells = np.floor_divide(positions, self.cell_size).astype(np.int64)
+        keys = self.cell_keys(cells[:, 0], cells[:, 1])
+
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.items = np.asarray(items)[order]
+
+    # items of every cell touched by a circle, some of them may be outside it
+    def query(self, x, y, radius):
+        x0, x1 = int((x - radius) // self.cell_size), int((x + radius) // self.cell_size)
+        y0, y1 = int((y - radius) // self.cell_size), int((y + radius) // self.cell_size)
+        cells_x, cells_y = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1), indexing='ij')
+        keys = self.cell_keys(cells_x.ravel(), cells_y.ravel())
+
+        starts = np.searchsorted(self.keys, keys, side='left')
+        ends = np.searchsorted(self.keys, keys, side='right')
+        if not (ends - starts).any():
+            return self.items[:0]
+
+        return np.concatenate([self.items[start:end] for start, end in zip(starts, ends) if end > start])
+
+    # (point, item) pairs for the 3x3 cells around every point, enough for circles up to cell_size
+    def neighbours(self, points):
+        cells = np.floor_divide(points, self.cell_size).astype(np.int64)
+        offsets = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        around = cells[:, None, :] + offsets[None, :, :]
+        keys = self.cell_keys(around[..., 0], around[..., 1]).ravel()
+
+        starts = np.searchsorted(self.keys, keys, side='left')
+        counts = np.searchsorted(self.keys, keys, side='right') - starts
+        owners = np.repeat(np.repeat(np.arange(len(points)), len(offsets)), counts)
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+        return owners, self.items[slots]
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+# distances and bearings to the hero and projectile hits for all enemies at once, enemies farther than
+# far_factor * shoot_dist only think every far_interval ticks (spread over the ticks),
+# enemies out of the viewport are not rendered
+class EnemyAI:
+    def __init__(self, far_factor=2, far_interval=8):
+        self.far_factor = far_factor
+        self.far_interval = far_interval
+        self.ticks = 0
+
+    def update(self, enemies, hero, bullets, viewport):
+        self.ticks += 1
+        if not enemies:
+            return None
+
+        gravity_engine = enemies[0].gravity_engine
+        positions = gravity_engine.positions[[enemy.body for enemy in enemies]]
+        shoot_dists = np.array([enemy.shoot_dist for enemy in enemies], dtype=float)
+        margins = np.array([max(enemy.or_image.get_size()) for enemy in enemies], dtype=float)
+        radii = np.array([enemy.collision_radius for enemy in enemies], dtype=float)
+        hits = bullets.collide_all(positions, radii)
+
+        delta = np.array((hero.x, hero.y)) - positions
+        distances = np.sqrt((delta ** 2).sum(axis=1))
+        bearings = -np.degrees(np.arctan2(delta[:, 1], delta[:, 0]))
+
+        far = distances > shoot_dists * self.far_factor
+        thinking = ~far | ((self.ticks + np.arange(len(enemies))) % self.far_interval == 0)
+
+        visible = viewport.visible(positions, margins)
+
+        for enemy, distance, bearing, think, seen, hit in zip(enemies, distances.tolist(), bearings.tolist(),
+                                                              thinking.tolist(), visible.tolist(), hits.tolist()):
+            enemy.hit = None if hit < 0 else hit
+            enemy.hero_distance = distance
+            enemy.hero_bearing = bearing
+            enemy.visible = seen
+            enemy.elapsed = self.ticks - enemy.last_think if think else 0
+            if think:
+                enemy.last_think = self.ticks
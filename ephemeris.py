@@ -0,0 +1,122 @@
+import numpy as np
+
+
+# precomputed positions and speeds of moons, generated by windows of one orbital period
+# of the slowest of them (by default), any time inside is cubic hermite interpolation,
+# a new window is added when a query runs out of them, all of them are dropped when a moon was pushed
+class Ephemeris:
+    def __init__(self, gravity_engine, samples=256, horizon=None):
+        self.gravity_engine = gravity_engine
+        self.samples = samples
+        self.horizon = horizon
+
+        self.bodies = []
+        self.columns = dict()
+
+        self.start = 0
+        self.interval = 0
+        self.positions = None
+        self.velocities = None
+        self.revision = None
+
+        # engine copy continued window by window
+        self.shadow = None
+
+    def add(self, obj):
+        self.columns[obj.body] = len(self.bodies)
+        self.bodies.append(obj.body)
+        self.positions = None
+
+    def window_horizon(self, gravity_engine):
+        if self.horizon is not None:
+            return self.horizon
+
+        mean_motions = gravity_engine.mean_motions[self.bodies][gravity_engine.rails[self.bodies]]
+        if not len(mean_motions):
+            return 36000
+
+        return 2 * np.pi / mean_motions.min()
+
+    # samples of one window starting at the time of gravity_engine, the shadow copy ends up at its end
+    def window(self, gravity_engine):
+        bodies = np.array(self.bodies)
+        frames = np.arange(self.samples + 1) * self.interval
+        self.shadow = gravity_engine.snapshot()
+
+        parents = gravity_engine.parents[bodies]
+        if gravity_engine.rails[bodies].all() and not gravity_engine.rails[parents].any() and \
+                not np.isin(parents, bodies).any():
+            # closed form for the whole window at once
+            positions, velocities = gravity_engine.rails_states(bodies, frames)
+            self.shadow.pending[bodies] = True
+            self.shadow.step(frames[-1])
+            return positions, velocities
+
+        positions = np.zeros((len(frames), len(bodies), 2))
+        velocities = np.zeros((len(frames), len(bodies), 2))
+        positions[0] = self.shadow.positions[bodies]
+        velocities[0] = self.shadow.velocities[bodies]
+
+        for i in range(1, len(frames)):
+            self.shadow.pending[bodies] = True
+            self.shadow.step(self.interval)
+            positions[i] = self.shadow.positions[bodies]
+            velocities[i] = self.shadow.velocities[bodies]
+
+        return positions, velocities
+
+    def generate(self):
+        self.start = self.gravity_engine.time
+        self.interval = self.window_horizon(self.gravity_engine) / self.samples
+        self.positions, self.velocities = self.window(self.gravity_engine)
+
+    def extend(self):
+        positions, velocities = self.window(self.shadow)
+        self.positions = np.concatenate((self.positions, positions[1:]))
+        self.velocities = np.concatenate((self.velocities, velocities[1:]))
+
+    def end(self):
+        return self.start + self.interval * (len(self.positions) - 1)
+
+    def update(self, time):
+        revision = self.gravity_engine.revisions[self.bodies].sum()
+        if self.positions is None or revision != self.revision or self.gravity_engine.time < self.start:
+            self.revision = revision
+            self.generate()
+
+        # samples the game has already passed
+        passed = int((self.gravity_engine.time - self.start) // self.interval) - 1
+        if passed > self.samples:
+            self.start += passed * self.interval
+            self.positions = self.positions[passed:]
+            self.velocities = self.velocities[passed:]
+
+        while time > self.end():
+            self.extend()
+
+    # positions of all moons at time (shape (bodies, 2)) or times (shape (times, bodies, 2))
+    def state(self, time):
+        times = np.atleast_1d(np.asarray(time, dtype=float))
+        self.update(times.max())
+
+        u = np.clip((times - self.start) / self.interval, 0, len(self.positions) - 1 - 1e-9)
+        i = u.astype(int)
+        u = (u - i)[:, None, None]
+
+        # speeds are per second, hermite tangents are per sample interval
+        tangent = self.interval / self.gravity_engine.fps
+        p0, p1 = self.positions[i], self.positions[i + 1]
+        v0, v1 = self.velocities[i], self.velocities[i + 1]
+
+        positions = (2 * u ** 3 - 3 * u ** 2 + 1) * p0 + (u ** 3 - 2 * u ** 2 + u) * v0 * tangent + \
+                    (-2 * u ** 3 + 3 * u ** 2) * p1 + (u ** 3 - u ** 2) * v1 * tangent
+        velocities = (6 * u ** 2 - 6 * u) * p0 / tangent + (3 * u ** 2 - 4 * u + 1) * v0 + \
+                     (-6 * u ** 2 + 6 * u) * p1 / tangent + (3 * u ** 2 - 2 * u) * v1
+
+        if np.ndim(time) == 0:
+            return positions[0], velocities[0]
+        return positions, velocities
+
+    def position(self, obj, time):
+        positions, velocities = self.state(time)
+        return positions[..., self.columns[obj.body], :]
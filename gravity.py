@@ -0,0 +1,293 @@
+import copy
+import numpy as np
+
+ARRAYS = ('positions', 'velocities', 'thrusts', 'masses', 'parents', 'attractors', 'pending',
+          'rails', 'depths', 'semi_major_axes', 'eccentricities', 'periapsis_arguments', 'directions',
+          'mean_anomalies', 'mean_motions', 'revisions')
+
+
+# position and speed relative to the orbit parent for given orbital elements
+# (time in frames, speed in units per second like everywhere in the game)
+def kepler_state(semi_major_axis, eccentricity, periapsis_argument, direction, mean_anomaly, mean_motion, fps):
+    eccentric_anomaly = np.where(eccentricity > 0.8, np.pi, mean_anomaly)
+    for i in range(12):
+        eccentric_anomaly = eccentric_anomaly - (eccentric_anomaly - eccentricity * np.sin(eccentric_anomaly) -
+                                                 mean_anomaly) / (1 - eccentricity * np.cos(eccentric_anomaly))
+
+    cos_e, sin_e = np.cos(eccentric_anomaly), np.sin(eccentric_anomaly)
+    semi_minor_axis = semi_major_axis * np.sqrt(1 - eccentricity ** 2)
+    anomaly_speed = mean_motion / (1 - eccentricity * cos_e) * fps
+
+    # coordinates along the apse line and across it (in the direction of motion)
+    p, q = semi_major_axis * (cos_e - eccentricity), direction * semi_minor_axis * sin_e
+    speed_p, speed_q = -semi_major_axis * sin_e * anomaly_speed, direction * semi_minor_axis * cos_e * anomaly_speed
+
+    cos_w, sin_w = np.cos(periapsis_argument), np.sin(periapsis_argument)
+    positions = np.stack((p * cos_w - q * sin_w, p * sin_w + q * cos_w), axis=-1)
+    velocities = np.stack((speed_p * cos_w - speed_q * sin_w, speed_p * sin_w + speed_q * cos_w), axis=-1)
+    return positions, velocities
+
+
+# struct-of-arrays n-body engine owned by PlanetarySystem
+# objects only keep their index (body) and read x, y, speed_x, speed_y from here
+class GravityEngine:
+    def __init__(self, gravity, fps, capacity=32, accuracy=0.02, max_substeps=64):
+        self.gravity = gravity
+        self.fps = fps
+
+        # leapfrog step is at most accuracy * orbital timescale
+        self.accuracy = accuracy
+        self.max_substeps = max_substeps
+
+        # frames simulated so far
+        self.time = 0
+
+        self.size = 0
+        self.free = []
+
+        self.positions = np.zeros((capacity, 2))
+        self.velocities = np.zeros((capacity, 2))
+        self.thrusts = np.zeros((capacity, 2))
+        self.masses = np.zeros(capacity)
+
+        # -1 - attracted by every attractor, otherwise only by this body (orbit_parent)
+        self.parents = np.full(capacity, -1)
+        self.attractors = np.zeros(capacity, dtype=bool)
+
+        # bodies which asked for a move in the current frame
+        self.pending = np.zeros(capacity, dtype=bool)
+
+        # bodies on rails follow a fixed kepler orbit around their parent instead of integration
+        self.rails = np.zeros(capacity, dtype=bool)
+        self.depths = np.zeros(capacity, dtype=int)
+        self.semi_major_axes = np.zeros(capacity)
+        self.eccentricities = np.zeros(capacity)
+        self.periapsis_arguments = np.zeros(capacity)
+        self.directions = np.zeros(capacity)
+        self.mean_anomalies = np.zeros(capacity)
+        self.mean_motions = np.zeros(capacity)
+
+        # bumped whenever something else than gravity changes the state of a body
+        self.revisions = np.zeros(capacity, dtype=int)
+
+    def add(self, obj, attractor=False, parent=None, rails=False):
+        if self.free:
+            index = self.free.pop()
+
+        else:
+            if self.size == len(self.masses):
+                self.grow()
+
+            index = self.size
+            self.size += 1
+
+        self.positions[index] = obj.x, obj.y
+        self.velocities[index] = obj.speed_x, obj.speed_y
+        self.thrusts[index] = 0, 0
+        self.masses[index] = getattr(obj, 'mass', 0)
+        self.parents[index] = -1 if parent is None else parent.body
+        self.attractors[index] = attractor
+        self.pending[index] = False
+        self.rails[index] = False
+        self.revisions[index] += 1
+
+        obj.gravity_engine, obj.body = self, index
+        if rails:
+            self.put_on_rails(index)
+
+        return index
+
+    def remove(self, obj):
+        if obj.gravity_engine is not self:
+            return None
+
+        index = obj.body
+        x, y = self.positions[index]
+        speed_x, speed_y = self.velocities[index]
+
+        obj.gravity_engine, obj.body = None, None
+        obj.x, obj.y, obj.speed_x, obj.speed_y = float(x), float(y), float(speed_x), float(speed_y)
+
+        self.attractors[index] = False
+        self.pending[index] = False
+        self.rails[index] = False
+        self.masses[index] = 0
+        self.free.append(index)
+
+    # independent copy for predictions, objects stay bound to the original
+    def snapshot(self):
+        gravity_engine = copy.copy(self)
+        for name in ARRAYS:
+            setattr(gravity_engine, name, getattr(self, name).copy())
+
+        gravity_engine.free = list(self.free)
+        return gravity_engine
+
+    def grow(self):
+        capacity = len(self.masses) * 2
+        for name in ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+        self.parents[self.size:] = -1
+
+    def request_move(self, index, a_x=0, a_y=0):
+        if a_x or a_y:
+            self.rails[index] = False
+            self.revisions[index] += 1
+
+        self.pending[index] = True
+        self.thrusts[index] += a_x, a_y
+
+    # orbital elements from the current state relative to the parent,
+    # stays numeric if there is no parent or the orbit is not closed
+    def put_on_rails(self, index):
+        parent = self.parents[index]
+        if parent < 0:
+            return False
+
+        mu = self.gravity * self.masses[parent] / self.fps
+        x, y = self.positions[index] - self.positions[parent]
+        speed_x, speed_y = (self.velocities[index] - self.velocities[parent]) / self.fps
+
+        distance = (x ** 2 + y ** 2) ** 0.5
+        energy = (speed_x ** 2 + speed_y ** 2) / 2 - mu / distance
+        if energy >= 0:
+            return False
+
+        semi_major_axis = -mu / (2 * energy)
+        radial_speed = x * speed_x + y * speed_y
+        e_x = ((speed_x ** 2 + speed_y ** 2 - mu / distance) * x - radial_speed * speed_x) / mu
+        e_y = ((speed_x ** 2 + speed_y ** 2 - mu / distance) * y - radial_speed * speed_y) / mu
+        eccentricity = (e_x ** 2 + e_y ** 2) ** 0.5
+        if eccentricity >= 1:
+            return False
+
+        direction = 1 if x * speed_y - y * speed_x >= 0 else -1
+        periapsis_argument = np.arctan2(e_y, e_x)
+        true_anomaly = direction * (np.arctan2(y, x) - periapsis_argument)
+        eccentric_anomaly = np.arctan2((1 - eccentricity ** 2) ** 0.5 * np.sin(true_anomaly),
+                                       eccentricity + np.cos(true_anomaly))
+
+        self.semi_major_axes[index] = semi_major_axis
+        self.eccentricities[index] = eccentricity
+        self.periapsis_arguments[index] = periapsis_argument
+        self.directions[index] = direction
+        self.mean_anomalies[index] = eccentric_anomaly - eccentricity * np.sin(eccentric_anomaly)
+        self.mean_motions[index] = (mu / semi_major_axis ** 3) ** 0.5
+        self.depths[index] = self.depths[parent] + 1 if self.rails[parent] else 0
+        self.rails[index] = True
+        return True
+
+    def advance_rails(self, bodies, frames):
+        if not len(bodies):
+            return None
+
+        self.mean_anomalies[bodies] = (self.mean_anomalies[bodies] + self.mean_motions[bodies] * frames) % (2 * np.pi)
+        positions, velocities = kepler_state(self.semi_major_axes[bodies],
+                                             self.eccentricities[bodies],
+                                             self.periapsis_arguments[bodies],
+                                             self.directions[bodies],
+                                             self.mean_anomalies[bodies],
+                                             self.mean_motions[bodies],
+                                             self.fps)
+
+        # parents on rails have to be moved before their children
+        depths = self.depths[bodies]
+        for depth in np.unique(depths):
+            level = depths == depth
+            parents = self.parents[bodies[level]]
+            self.positions[bodies[level]] = self.positions[parents] + positions[level]
+            self.velocities[bodies[level]] = self.velocities[parents] + velocities[level]
+
+    def pairs(self, bodies):
+        sources = np.flatnonzero(self.attractors[:self.size])
+
+        delta = self.positions[bodies, None, :] - self.positions[None, sources, :]
+        distance_2 = (delta ** 2).sum(axis=2)
+        distance_2[distance_2 == 0] = np.inf
+
+        parents = self.parents[bodies, None]
+        weights = self.masses[sources][None, :] * ((parents < 0) | (parents == sources[None, :]))
+        weights[bodies[:, None] == sources[None, :]] = 0
+
+        return delta, distance_2, weights
+
+    def accelerations(self, bodies):
+        delta, distance_2, weights = self.pairs(bodies)
+        return -self.gravity * (delta * (weights / (distance_2 * np.sqrt(distance_2)))[:, :, None]).sum(axis=1)
+
+    # number of leapfrog steps for game_speed frames, taken from the shortest
+    # orbital timescale (in frames) among the moving bodies and their attractors
+    def substeps(self, bodies, game_speed):
+        delta, distance_2, weights = self.pairs(bodies)
+        with np.errstate(divide='ignore'):
+            timescale = np.sqrt(distance_2 ** 1.5 * self.fps / (self.gravity * weights))
+
+        if not timescale.size:
+            return 1
+
+        step = self.accuracy * timescale.min()
+        return int(min(self.max_substeps, max(1, np.ceil(game_speed / step))))
+
+    # states of depth 0 rails bodies after each of frames (shape (times, bodies, 2)),
+    # parents are taken where they are now
+    def rails_states(self, bodies, frames):
+        mean_anomalies = self.mean_anomalies[bodies] + self.mean_motions[bodies] * np.asarray(frames)[:, None]
+        positions, velocities = kepler_state(self.semi_major_axes[bodies],
+                                             self.eccentricities[bodies],
+                                             self.periapsis_arguments[bodies],
+                                             self.directions[bodies],
+                                             mean_anomalies,
+                                             self.mean_motions[bodies],
+                                             self.fps)
+
+        parents = self.parents[bodies]
+        return self.positions[parents] + positions, self.velocities[parents] + velocities
+
+    # kick-drift-kick leapfrog for every body which called physical_move in this frame,
+    # bodies on rails only get their mean anomaly moved
+    def step(self, game_speed):
+        self.time += game_speed
+        pending = np.flatnonzero(self.pending[:self.size])
+        if not len(pending):
+            return None
+
+        on_rails = pending[self.rails[pending]]
+        bodies = pending[~self.rails[pending]]
+
+        substeps = self.substeps(bodies, game_speed)
+        h = game_speed / substeps
+        thrusts = self.thrusts[bodies]
+
+        acceleration = self.accelerations(bodies) + thrusts
+        for i in range(substeps):
+            self.velocities[bodies] += acceleration * h / 2
+            self.positions[bodies] += self.velocities[bodies] / self.fps * h
+            self.advance_rails(on_rails, h)
+
+            acceleration = self.accelerations(bodies) + thrusts
+            self.velocities[bodies] += acceleration * h / 2
+
+        self.thrusts[pending] = 0
+        self.pending[pending] = False
+
+
+def gravity_view(name, array, axis):
+    def getter(self):
+        if self.gravity_engine is None:
+            return self.__dict__[name]
+        return float(getattr(self.gravity_engine, array)[self.body, axis])
+
+    def setter(self, value):
+        if self.gravity_engine is None:
+            self.__dict__[name] = value
+        else:
+            # anything moved from outside is not on its kepler orbit any more
+            getattr(self.gravity_engine, array)[self.body, axis] = value
+            self.gravity_engine.rails[self.body] = False
+            self.gravity_engine.revisions[self.body] += 1
+
+    return property(getter, setter)
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+# accelerations (per frame, like GravityEngine.accelerations) around static attractors, baked into
+# nested square grids: level k spans 2 * size * 2 ** k around origin, every point is looked up
+# bilinearly in the finest level which contains it, points outside all of them get the exact value
+class GravityField:
+    def __init__(self, gravity, resolution=129, levels=5):
+        self.gravity = gravity
+        self.resolution = resolution
+        self.levels = levels
+
+        self.origin = np.zeros(2)
+        self.size = 1
+        self.grids = None
+        self.key = None
+
+        self.centers = np.zeros((0, 2))
+        self.masses = np.zeros(0)
+        self.inner = 0
+
+    def exact(self, positions):
+        delta = positions[:, None, :] - self.centers[None, :, :]
+        distance_2 = np.maximum((delta ** 2).sum(axis=2), self.inner ** 2)
+        return -self.gravity * (delta * (self.masses / (distance_2 * np.sqrt(distance_2)))[:, :, None]).sum(axis=1)
+
+    # inner: accelerations stop growing closer than that to a center (projectiles crash there anyway)
+    def bake(self, centers, masses, size, inner):
+        key = (tuple(map(tuple, centers)), tuple(masses), size, inner)
+        if key == self.key:
+            return None
+
+        self.key = key
+        self.centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        self.masses = np.asarray(masses, dtype=float)
+        self.origin = self.centers[0] if len(self.centers) else np.zeros(2)
+        self.size = size
+        self.inner = inner
+
+        self.grids = np.zeros((self.levels, self.resolution, self.resolution, 2))
+        line = np.linspace(-1, 1, self.resolution)
+        for level in range(self.levels):
+            half = size * 2 ** level
+            xs, ys = np.meshgrid(self.origin[0] + line * half, self.origin[1] + line * half, indexing='ij')
+            nodes = np.stack((xs.ravel(), ys.ravel()), axis=-1)
+            self.grids[level] = self.exact(nodes).reshape(self.resolution, self.resolution, 2)
+
+    def sample(self, positions):
+        accelerations = np.zeros((len(positions), 2))
+        if self.grids is None or not len(positions):
+            return accelerations
+
+        relative = positions - self.origin
+        extent = np.abs(relative).max(axis=1) / self.size
+        with np.errstate(divide='ignore'):
+            levels = np.ceil(np.log2(np.maximum(extent, 1))).astype(int)
+
+        outside = levels >= self.levels
+        accelerations[outside] = self.exact(positions[outside])
+
+        inside = ~outside
+        levels = levels[inside]
+        half = self.size * 2.0 ** levels
+        u = (relative[inside] + half[:, None]) / (2 * half[:, None]) * (self.resolution - 1)
+        i = np.clip(np.floor(u).astype(int), 0, self.resolution - 2)
+        f = u - i
+
+        grids = self.grids
+        a00 = grids[levels, i[:, 0], i[:, 1]]
+        a10 = grids[levels, i[:, 0] + 1, i[:, 1]]
+        a01 = grids[levels, i[:, 0], i[:, 1] + 1]
+        a11 = grids[levels, i[:, 0] + 1, i[:, 1] + 1]
+        fx, fy = f[:, 0, None], f[:, 1, None]
+        accelerations[inside] = (a00 * (1 - fx) + a10 * fx) * (1 - fy) + (a01 * (1 - fx) + a11 * fx) * fy
+
+        return accelerations
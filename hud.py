@@ -0,0 +1,42 @@
+import pygame
+
+
+# retained interface layer: every part is a small surface drawn again only when its key changes,
+# parts given during a frame are composited with one blits call
+class HudLayer:
+    def __init__(self):
+        self.parts = dict()
+        self.frame = []
+
+    def part(self, name, key, position, draw):
+        if name not in self.parts or self.parts[name][0] != key:
+            self.parts[name] = key, draw()
+
+        self.frame.append((self.parts[name][1], position))
+
+    def blits(self):
+        frame, self.frame = self.frame, []
+        return frame
+
+
+def draw_bar(count, color, size=(8, 20), step=10):
+    surface = pygame.Surface((count * step, size[1]), pygame.SRCALPHA, 32)
+    surface.fill((0, 0, 0, 0))
+    for i in range(count):
+        pygame.draw.rect(surface, color, (i * step, 0, size[0], size[1]))
+
+    return surface
+
+
+def draw_magazine(weapon):
+    height = weapon.bullet_image.get_height()
+    surface = pygame.Surface((weapon.bullet_image.get_width(), weapon.magazine_size * height), pygame.SRCALPHA, 32)
+    surface.fill((0, 0, 0, 0))
+    for j in range(weapon.magazine_size):
+        if j < weapon.magazine_filling:
+            surface.blit(weapon.bullet_image, (0, j * height))
+
+        else:
+            surface.blit(weapon.bullet_image_hollow, (0, j * height))
+
+    return surface
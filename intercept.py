@@ -0,0 +1,82 @@
+import numpy as np
+
+
+# time and distance of the closest approach between the predicted path of the hero
+# and every enemy orbit, solved again only when one of the trajectories changes
+class InterceptSolver:
+    def __init__(self, gravity_engine, predictor, wake_margin=1.5):
+        self.gravity_engine = gravity_engine
+        self.predictor = predictor
+        self.wake_margin = wake_margin
+
+        self.approaches = dict()
+        self.key = None
+        self.end = 0
+
+    def update(self, hero, enemies, now):
+        bodies = [hero.body] + [enemy.body for enemy in enemies]
+        key = (self.gravity_engine.revisions[bodies].sum(), len(enemies),
+               self.predictor.resets, self.predictor.prediction is None)
+
+        if key != self.key or now > self.end:
+            self.key = key
+            self.solve(hero, enemies, now)
+
+    def enemy_paths(self, enemies, frames):
+        gravity_engine = self.gravity_engine
+        bodies = np.array([enemy.body for enemy in enemies])
+        paths = np.zeros((len(frames), len(bodies), 2))
+
+        analytic = gravity_engine.rails[bodies] & ~gravity_engine.rails[gravity_engine.parents[bodies]]
+        if analytic.any():
+            positions, velocities = gravity_engine.rails_states(bodies[analytic], frames)
+            paths[:, analytic] = positions
+
+        if not analytic.all():
+            shadow = gravity_engine.snapshot()
+            moons = np.flatnonzero(shadow.rails[:shadow.size] & shadow.attractors[:shadow.size])
+            moving = np.concatenate((bodies[~analytic], moons))
+            paths[0, ~analytic] = shadow.positions[bodies[~analytic]]
+            for i in range(1, len(frames)):
+                shadow.pending[moving] = True
+                shadow.step(frames[i] - frames[i - 1])
+                paths[i, ~analytic] = shadow.positions[bodies[~analytic]]
+
+        return paths
+
+    def solve(self, hero, enemies, now):
+        self.approaches = dict()
+        times, points = self.predictor.timed_path()
+        self.end = times[-1] if len(times) else now
+
+        if not enemies or not len(times):
+            return None
+
+        times = np.concatenate(([now], times))
+        hero_path = np.concatenate(([(hero.x, hero.y)], points))
+        relative = self.enemy_paths(enemies, times - now) - hero_path[:, None, :]
+
+        # closest point of every segment between two path points, both bodies move linearly there
+        delta = relative[1:] - relative[:-1]
+        length_2 = (delta ** 2).sum(axis=2)
+        length_2[length_2 == 0] = 1
+        s = np.clip(-(relative[:-1] * delta).sum(axis=2) / length_2, 0, 1)
+        distances = np.sqrt(((relative[:-1] + delta * s[:, :, None]) ** 2).sum(axis=2))
+
+        segments = distances.argmin(axis=0)
+        columns = np.arange(len(enemies))
+        closest_times = times[segments] + s[segments, columns] * (times[segments + 1] - times[segments])
+
+        for enemy, closest_time, distance in zip(enemies, closest_times, distances[segments, columns]):
+            self.approaches[enemy] = float(closest_time), float(distance)
+
+    def approach(self, enemy):
+        return self.approaches.get(enemy)
+
+    def nearest(self):
+        return min(self.approaches.values(), key=lambda approach: approach[1], default=None)
+
+    # enemy has to watch the hero unless the hero will not come near it over the whole solved path
+    def awake(self, enemy, distance):
+        approach = self.approaches.get(enemy)
+        return approach is None or approach[1] < distance * self.wake_margin
@@ -1,8 +1,9 @@
 import pygame
 import math
-import copy
 import sqlite3
 import datetime as dt
+from text_cache import TEXTS
+from layers import grid, LayerStack
 
 MAP_GRAVITY = 6.67
 MAP_GAME_SPEED = 1
@@ -12,8 +13,11 @@ con = sqlite3.connect("game_database.db")
 
 class InterplanetaryMap:
     def __init__(self, size):
-        self.map_surface = pygame.Surface(size, pygame.SRCALPHA, 32)
-        self.background_surface = self.draw_background()
+        # orbits are drawn once on their own layer, above the shared grid
+        self.background_surface = pygame.Surface(size, pygame.SRCALPHA, 32)
+        self.background_surface.fill((0, 0, 0, 0))
+        self.layers = LayerStack(grid(size), self.background_surface)
+        self.map_surface = self.layers.clear()
         self.labels = dict()
         self.font = pygame.font.SysFont(None, 20)
         self.objects = []
@@ -48,34 +52,17 @@ class InterplanetaryMap:
                          (pygame.mouse.get_pos()[0], self.map_surface.get_size()[1]),
                          (pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1] + rect_size // 2))
 
-    def draw_background(self):
-        grid_surface = pygame.Surface(self.map_surface.get_size(), pygame.SRCALPHA, 32)
-        grid_surface.fill((0, 0, 0, 0))
-        for i in range(1, 160):
-            pygame.draw.line(grid_surface, (0, 15, 0), (i * 9, 0), (i * 9, self.map_surface.get_height()))
-
-        for i in range(1, 100):
-            pygame.draw.line(grid_surface, (0, 15, 0), (0, i * 9), (self.map_surface.get_width(), i * 9))
-
-        for i in range(1, 16):
-            pygame.draw.line(grid_surface, (0, 35, 0), (i * 90, 0), (i * 90, self.map_surface.get_height()))
-
-        for i in range(1, 10):
-            pygame.draw.line(grid_surface, (0, 35, 0), (0, i * 90), (self.map_surface.get_width(), i * 90))
-
-        return grid_surface
-
     def update(self):
-        self.map_surface = copy.copy(self.background_surface)
-        self.map_surface.blit(self.font.render('NAVCOM power ON', True, 'green'), (20, 20))
+        self.map_surface = self.layers.clear()
+        self.map_surface.blit(TEXTS.render(self.font, 'NAVCOM power ON', True, 'green'), (20, 20))
 
         if self.hero.in_travel:
-            self.map_surface.blit(self.font.render('ENGINE power ON', True, 'green'), (20, 45))
-            self.map_surface.blit(self.font.render('hibernation mode ON', True, 'green'), (20, 70))
+            self.map_surface.blit(TEXTS.render(self.font, 'ENGINE power ON', True, 'green'), (20, 45))
+            self.map_surface.blit(TEXTS.render(self.font, 'hibernation mode ON', True, 'green'), (20, 70))
 
         else:
-            self.map_surface.blit(self.font.render('ENGINE power OFF', True, 'green'), (20, 45))
-            self.map_surface.blit(self.font.render('hibernation mode OFF', True, 'green'), (20, 70))
+            self.map_surface.blit(TEXTS.render(self.font, 'ENGINE power OFF', True, 'green'), (20, 45))
+            self.map_surface.blit(TEXTS.render(self.font, 'hibernation mode OFF', True, 'green'), (20, 70))
 
         if self.show_records:
             self.map_surface.blit(self.record_surface, (self.map_surface.get_width() - 220, 100))
@@ -102,7 +89,7 @@ class InterplanetaryMap:
             pygame.draw.line(self.map_surface, 'green', key.pos(),
                              (key.x + 50, key.y - 50))
 
-            out = self.font.render(' '.join(self.labels[key]), True, 'green')
+            out = TEXTS.render(self.font, ' '.join(self.labels[key]), True, 'green')
             self.map_surface.blit(out, (key.x + 55, key.y - 68))
 
             pygame.draw.line(self.map_surface, 'green', (key.x + 50, key.y - 50),
@@ -111,8 +98,8 @@ class InterplanetaryMap:
     def add_text_to_label(self, obj, *args):
         self.labels[obj] = list(map(str, args))
 
-    def surface(self):
-        return self.map_surface
+    def draw(self, surface):
+        self.layers.compose(surface)
 
     def click_object(self, pos):
         for button in self.buttons:
@@ -154,7 +141,8 @@ class InterplanetaryMap:
                             ':' +\
                             str((int(line[1]) % 3600) % 60).rjust(2, '0')
 
-                surface.blit(self.font.render(str(i + 1) + ':  ' + start_time + ' --- ' + game_time, True, 'green'), (0, i * 30))
+                text = str(i + 1) + ':  ' + start_time + ' --- ' + game_time
+                surface.blit(TEXTS.render(self.font, text, True, 'green'), (0, i * 30))
 
         self.record_surface = surface
 
@@ -274,6 +262,7 @@ class PlanetOnMap(StarOnMap, PhysicalObjectOnMap):
 
         ellipse_surface, ellipse_surface_coords_delta = self.draw_ellipse()
         self.map.background_surface.blit(ellipse_surface, ellipse_surface_coords_delta)
+        self.map.layers.invalidate()
 
     def start_position_calculation(self):
         return self.start_height * math.cos(math.radians(self.apsis_argument)) + self.orbital_parent.x, \
@@ -0,0 +1,54 @@
+import pygame
+
+# background grids by screen size and color
+GRIDS = dict()
+
+
+# opaque grid of the map screens, drawn once for a size and color and shared, nothing is drawn on it
+def grid(size, color=(0, 0, 0)):
+    if (size, color) not in GRIDS:
+        grid_surface = pygame.Surface(size)
+        grid_surface.fill(color)
+        for i in range(1, 160):
+            pygame.draw.line(grid_surface, (0, 15, 0), (i * 9, 0), (i * 9, size[1]))
+
+        for i in range(1, 100):
+            pygame.draw.line(grid_surface, (0, 15, 0), (0, i * 9), (size[0], i * 9))
+
+        for i in range(1, 16):
+            pygame.draw.line(grid_surface, (0, 35, 0), (i * 90, 0), (i * 90, size[1]))
+
+        for i in range(1, 10):
+            pygame.draw.line(grid_surface, (0, 35, 0), (0, i * 90), (size[0], i * 90))
+
+        GRIDS[size, color] = grid_surface
+
+    return GRIDS[size, color]
+
+
+# screen built from an opaque background, static transparent layers drawn once and a transparent overlay which is
+# cleared and drawn again every frame in the same buffer; the background and the static layers are flattened
+# once, so composing is one opaque blit and one overlay blit without any new surface
+class LayerStack:
+    def __init__(self, background, *layers):
+        self.background = background
+        self.layers = list(layers)
+        self.flat = None
+        self.overlay = pygame.Surface(background.get_size(), pygame.SRCALPHA, 32)
+
+    # static layers were drawn on
+    def invalidate(self):
+        self.flat = None
+
+    def clear(self):
+        self.overlay.fill((0, 0, 0, 0))
+        return self.overlay
+
+    def compose(self, target):
+        if self.flat is None:
+            self.flat = self.background
+            if self.layers:
+                self.flat = self.background.copy()
+                self.flat.blits([(layer, (0, 0)) for layer in self.layers], doreturn=False)
+
+        target.blits([(self.flat, (0, 0)), (self.overlay, (0, 0))], doreturn=False)
@@ -4,6 +4,7 @@ import copy
 from planetary_system import PhysicalObject, Spaceship, Planet, Moon, PlanetarySystem
 from interplanetary_map import InterplanetaryMap, PhysicalObjectOnMap, HeroOnMap, StarOnMap, PlanetOnMap
 from weapon import Bullet, Shell, Weapon
+from assets import ASSETS
 import sqlite3
 
 FPS = 60
@@ -41,6 +42,7 @@ def load_system(id, new=True):
                             int(hero_angle),
                             float(hero_speed_x),
                             float(hero_speed_y))
+    system.gravity_engine.add(system.hero)
 
     first_weapon = copy.copy(minigun_weapon)
     first_weapon.set_group(system.bullets)
@@ -98,8 +100,7 @@ clock = pygame.time.Clock()
 REDRAW_EVENT = pygame.USEREVENT + 1
 pygame.time.set_timer(REDRAW_EVENT, 1000 // FPS)
 
-aim = pygame.image.load(os.path.join('data', 'aim.png')).convert()
-aim = pygame.transform.scale(aim, (20, 20))
+aim = ASSETS.image('aim.png', (20, 20))
 instruction = True
 
 text_3 = font.render('press any button to continue', False, (100, 255, 100))
@@ -125,7 +126,7 @@ while running:
             screen.fill('black')
             if interplanetary_map_mode:
                 interplanetary_map.update()
-                screen.blit(interplanetary_map.surface(), (0, 0))
+                interplanetary_map.draw(screen)
 
             else:
                 current_system.update()
@@ -147,7 +148,7 @@ while running:
             if not interplanetary_map_mode:
                 # time speed changing
                 if event.key == pygame.K_RIGHTBRACKET and \
-                        current_system.game_speed < 5 ** 2:
+                        current_system.game_speed < 5 ** 3:
                     current_system.game_speed *= 5
 
                 if event.key == pygame.K_LEFTBRACKET and \
@@ -167,6 +168,14 @@ while running:
                     current_system.map_mode:
                 current_system.simulation()
 
+            if event.key == pygame.K_b and \
+                    not interplanetary_map_mode and \
+                    current_system.map_mode:
+                current_system.suggest_burn()
+
+        elif event.type == pygame.MOUSEWHEEL and not interplanetary_map_mode and current_system.map_mode:
+            current_system.zoom(-event.y)
+
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == pygame.BUTTON_LEFT and interplanetary_map_mode:
             cmd = interplanetary_map.click_object(event.pos)
             if cmd == 3:
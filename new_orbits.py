@@ -1,8 +1,10 @@
-import os
 import pygame
 import random
 import math
-import copy
+import numpy as np
+from assets import ASSETS
+from text_cache import TEXTS
+from layers import grid, LayerStack
 
 pygame.init()
 pygame.mouse.set_visible(False)
@@ -21,24 +23,10 @@ MAP_VIEW_SIZE = 250
 """
 
 
-def load_image(name, color_key=None):
-    fullname = os.path.join('data', name)
-    image = pygame.image.load(fullname).convert()
-
-    if color_key is not None:
-        if color_key == -1:
-            color_key = image.get_at((0, 0))
-        image.set_colorkey(color_key)
-    else:
-        image = image.convert_alpha()
-
-    return image
-
-
 class Interface:
     def __init__(self, surface):
-        self.interface_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA, 32)
-        self.grid_surface = self.draw_background()
+        self.layers = LayerStack(grid(surface.get_size(), (0, 10, 0)))
+        self.interface_surface = self.layers.clear()
         self.labels = dict()
         self.font = pygame.font.SysFont(None, 20)
 
@@ -61,29 +49,12 @@ class Interface:
                          (pygame.mouse.get_pos()[0], self.interface_surface.get_size()[1]),
                          (pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1] + rect_size // 2))
 
-    def draw_background(self):
-        grid_surface = pygame.Surface(self.interface_surface.get_size(), pygame.SRCALPHA, 32)
-        grid_surface.fill((0, 0, 0, 0))
-        for i in range(1, 160):
-            pygame.draw.line(grid_surface, (0, 15, 0), (i * 9, 0), (i * 9, self.interface_surface.get_height()))
-
-        for i in range(1, 100):
-            pygame.draw.line(grid_surface, (0, 15, 0), (0, i * 9), (self.interface_surface.get_width(), i * 9))
-
-        for i in range(1, 16):
-            pygame.draw.line(grid_surface, (0, 35, 0), (i * 90, 0), (i * 90, self.interface_surface.get_height()))
-
-        for i in range(1, 10):
-            pygame.draw.line(grid_surface, (0, 35, 0), (0, i * 90), (self.interface_surface.get_width(), i * 90))
-
-        return grid_surface
-
     def get_cursor_global_pos(self):
         return map_cam_pos_x - (self.interface_surface.get_width() // 2 - pygame.mouse.get_pos()[0]) * MAP_VIEW_SIZE, \
                map_cam_pos_y - (self.interface_surface.get_height() // 2 - pygame.mouse.get_pos()[1]) * MAP_VIEW_SIZE
 
     def render_on_map(self):
-        self.interface_surface = copy.copy(self.grid_surface)
+        self.interface_surface = self.layers.clear()
         self.draw_cursor()
         self.draw_label()
 
@@ -92,7 +63,7 @@ class Interface:
             pygame.draw.line(self.interface_surface, 'green', key.pos_on_map(),
                              (key.pos_on_map()[0] + 50, key.pos_on_map()[1] - 50))
 
-            out = self.font.render(' '.join(self.labels[key]), True, 'green')
+            out = TEXTS.render(self.font, ' '.join(self.labels[key]), True, 'green')
             self.interface_surface.blit(out, (key.pos_on_map()[0] + 55, key.pos_on_map()[1] - 68))
 
             pygame.draw.line(self.interface_surface, 'green', (key.pos_on_map()[0] + 50, key.pos_on_map()[1] - 50),
@@ -102,40 +73,45 @@ class Interface:
         self.labels[obj] = list(map(str, args))
 
 
+# trail of the last positions: a fixed ring buffer of world points with the frame each was taken,
+# drawn straight onto the map as a polyline fading in a few steps
 class OrbitMarker:
-    def __init__(self, line_life=0):
+    def __init__(self, line_life=0, fade_steps=8):
         self.marker_on = True
         self.line_life = line_life
-        self.particles = []
+        self.fade_steps = fade_steps
         self.particle_counter = 0
-        self.render_counter = 0
-        self.marker_surface = pygame.Surface((0, 0), pygame.SRCALPHA, 32)
-        self.render_shift = random.randrange(0, 5)
+
+        self.line_frame = 0
+        self.line_head = 0
+        self.line_points = np.zeros((line_life // 2 + 1, 2))
+        self.line_frames = np.full(line_life // 2 + 1, -line_life)
 
     def make_line(self):
         self.particle_counter = (self.particle_counter + 1) % 2
+        self.line_frame += 1
 
-        if self.line_life != 0:
-            if self.marker_on and self.particle_counter == 0:
-                self.particles.append([(self.x, self.y), self.line_life])
-
-            self.particles = list(map(lambda x: [x[0], x[1] - 1], self.particles))
-            self.particles = list(filter(lambda x: x[1] > 10, self.particles))
+        if self.line_life != 0 and self.marker_on and self.particle_counter == 0:
+            self.line_points[self.line_head] = self.x, self.y
+            self.line_frames[self.line_head] = self.line_frame
+            self.line_head = (self.line_head + 1) % len(self.line_frames)
 
     def render_line(self, surface):
-        self.render_counter = (self.render_counter + 1) % 5
-
-        if self.render_counter == self.render_shift:
-            self.marker_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA, 32)
-            self.marker_surface.fill((0, 0, 0, 0))
+        # oldest to newest, a point lives line_life - 10 frames
+        order = np.roll(np.arange(len(self.line_frames)), -self.line_head)
+        order = order[self.line_frame - self.line_frames[order] < self.line_life - 10]
+        if len(order) < 2:
+            return None
 
-            coef = 200 / self.line_life
-            for particle in self.particles:
-                pygame.draw.circle(self.marker_surface,
-                                   (int(particle[1] * coef), int(particle[1] * coef), int(particle[1] * coef)),
-                                   particle[0], 2, 0)
+        points = (self.line_points[order] - (map_cam_pos_x, map_cam_pos_y)) / MAP_VIEW_SIZE + \
+                 (surface.get_width() // 2, surface.get_height() // 2)
+        lives = self.line_life - (self.line_frame - self.line_frames[order])
 
-        surface.blit(self.marker_surface, (0, 0))
+        coef = 200 / self.line_life
+        for part in np.array_split(np.arange(len(order)), min(self.fade_steps, len(order) - 1)):
+            part = np.append(part, min(part[-1] + 1, len(order) - 1))
+            color = int(lives[part].mean() * coef)
+            pygame.draw.lines(surface, (color, color, color), False, points[part].tolist(), 2)
 
 
 class PhysicalObject:
@@ -306,11 +282,9 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject, OrbitMarker)
         OrbitMarker.__init__(self, line_life=900)
 
         self.name = name
-        self.or_image = load_image("spaceship.png", -1)
-        self.or_image = pygame.transform.scale(self.or_image, (40, 40))
+        self.or_image = ASSETS.image("spaceship.png", (40, 40), -1)
 
-        self.or_map_image = load_image("spaceship_on_map.png", -1)
-        self.or_map_image = pygame.transform.scale(self.or_map_image, (20, 20))
+        self.or_map_image = ASSETS.image("spaceship_on_map.png", (20, 20), -1)
 
         self.rect = self.or_image.get_rect()
         self.image = self.or_image
@@ -488,7 +462,7 @@ while running:
 
             if map_mode:
                 interface.render_on_map()
-                map_view.blit(interface.interface_surface, (0, 0))
+                interface.layers.compose(map_view)
                 pygame.mouse.set_visible(False)
                 all_sprites.update(map_view)
                 all_sprites.draw(map_view)
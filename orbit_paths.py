@@ -0,0 +1,44 @@
+import math
+import numpy as np
+
+# map scales (world units per pixel) one zoom level apart differ by this factor
+ZOOM_STEP = 2 ** 0.25
+
+
+def zoom_level(scale):
+    return round(math.log(scale, ZOOM_STEP))
+
+
+# closed orbit polyline around the focus (the orbit parent) built from orbital elements in world space;
+# the number of points depends on how large the orbit is on the screen, so one polyline is kept per zoom level
+# and all of them are dropped only when the elements change
+class OrbitPath:
+    def __init__(self, segment=6, min_points=32, max_points=1024):
+        self.segment = segment
+        self.min_points = min_points
+        self.max_points = max_points
+        self.elements = None
+        self.levels = dict()
+
+    # semi-major axis, eccentricity and apsis argument in degrees, the start point is at the apsis argument
+    def set_elements(self, a, e, apsis_argument):
+        if (a, e, apsis_argument) != self.elements:
+            self.elements = a, e, apsis_argument
+            self.levels = dict()
+
+    def polyline(self, count):
+        a, e, apsis_argument = self.elements
+        t = np.linspace(0, 2 * math.pi, count, endpoint=False)
+        x, y = a * (np.cos(t) - e), a * (1 - e ** 2) ** 0.5 * np.sin(t)
+        angle = math.radians(apsis_argument)
+        return np.column_stack((x * math.cos(angle) - y * math.sin(angle), x * math.sin(angle) + y * math.cos(angle)))
+
+    # screen points for the focus at (x, y) on the screen and scale world units per pixel
+    def points(self, x, y, scale):
+        level = zoom_level(scale)
+        if level not in self.levels:
+            length = 2 * math.pi * self.elements[0] / ZOOM_STEP ** level
+            count = int(min(self.max_points, max(self.min_points, length / self.segment)))
+            self.levels[level] = self.polyline(count)
+
+        return (self.levels[level] / scale + (x, y)).tolist()
@@ -0,0 +1,62 @@
+import numpy as np
+import pygame
+
+
+# engine exhaust of all ships in a system: positions, per frame velocities and remaining lives are ring buffers,
+# a new particle takes the oldest slot when the buffer is full; a palette is a life -> color table with
+# a pre-rendered stamp for every life value, palettes are runs in one list of stamps and a palette id is the index
+# of its first stamp, so the stamp of a particle is stamps[palette + life] and drawing is one blits call
+class ParticleEngine:
+    def __init__(self, capacity=4096, radius=3, min_life=3):
+        self.capacity = capacity
+        self.radius = radius
+        self.min_life = min_life
+
+        self.positions = np.zeros((capacity, 2))
+        self.velocities = np.zeros((capacity, 2))
+        self.lives = np.zeros(capacity, dtype=int)
+        self.palettes = np.zeros(capacity, dtype=int)
+        self.head = 0
+
+        self.palette_ids = dict()
+        self.stamps = []
+
+    # colors fade from begin_color to end_color over life frames, lives up to life + 10 are kept
+    def palette(self, begin_color, end_color, life):
+        key = (tuple(begin_color), tuple(end_color), life)
+        if key not in self.palette_ids:
+            lives = np.arange(life + 10)[:, None]
+            colors = (lives * np.array(begin_color) + (life - lives) * np.array(end_color)) / (life + 10)
+            self.palette_ids[key] = len(self.stamps)
+            self.stamps.extend(self.stamp(color) for color in np.clip(colors, 0, 255).astype(int).tolist())
+
+        return self.palette_ids[key]
+
+    def stamp(self, color):
+        # inverted color is never the color itself, so it is a safe color key
+        key = tuple(255 - channel for channel in color)
+        image = pygame.Surface((self.radius * 2 + 1, self.radius * 2 + 1))
+        image.fill(key)
+        pygame.draw.circle(image, color, (self.radius, self.radius), self.radius)
+        image.set_colorkey(key, pygame.RLEACCEL)
+        return image
+
+    def spawn(self, palette, x, y, speed_x, speed_y, life):
+        i = self.head
+        self.head = (self.head + 1) % self.capacity
+        self.positions[i] = x, y
+        self.velocities[i] = speed_x, speed_y
+        self.lives[i] = life
+        self.palettes[i] = palette
+
+    def update(self):
+        alive = self.lives > self.min_life
+        self.positions[alive] += self.velocities[alive]
+        self.lives[alive] -= 1
+
+    def drawable(self, viewport):
+        alive = np.flatnonzero(self.lives > self.min_life)
+        visible = alive[viewport.visible(self.positions[alive], self.radius)]
+        screen = viewport.to_screen(self.positions[visible]) - self.radius
+        return list(zip(map(self.stamps.__getitem__, (self.palettes[visible] + self.lives[visible]).tolist()),
+                        screen.tolist()))
@@ -0,0 +1,138 @@
+import math
+import numpy as np
+import pygame
+
+ATMOSPHERE_COLORS = ((10, 50, 100), (100, 10, 10), (100, 100, 10))
+
+# halved copies of planet textures by source surface
+MIPS = dict()
+
+
+def mip_chain(texture, smallest=8):
+    if texture not in MIPS:
+        chain = [texture]
+        while min(chain[-1].get_size()) // 2 >= smallest:
+            w, h = chain[-1].get_size()
+            chain.append(pygame.transform.scale(chain[-1], (w // 2, h // 2)))
+        MIPS[texture] = chain
+
+    return MIPS[texture]
+
+
+# draws only the part of a planet (texture disc and atmosphere) which is on the screen, at screen resolution;
+# the planet is cut into tile x tile squares which are drawn when they come near the view and dropped when they
+# leave it, so moving draws only the new tiles and memory depends on the screen size and not on the planet radius
+class PlanetView:
+    def __init__(self, texture, radius, atmosphere_height, atmosphere_color, tile=256, margin=256):
+        self.radius = radius
+        self.atmosphere_height = atmosphere_height
+        self.atmosphere_color = atmosphere_color
+        self.tile = tile
+        self.margin = margin
+        self.bounds = pygame.Rect(-radius, -radius, radius * 2, radius * 2)
+
+        # texture disc: the smallest mip level which is not smaller than the disc on the screen
+        self.disc = radius - atmosphere_height
+        self.texture = texture
+        for level in mip_chain(texture):
+            if level.get_width() >= self.disc * 2 and level.get_height() >= self.disc * 2:
+                self.texture = level
+
+        # mapped pixels of the texture, tiles are gathered from them
+        self.texels = pygame.surfarray.array2d(self.texture)
+        self.key = None if self.texture.get_colorkey() is None else self.texture.map_rgb(self.texture.get_colorkey())
+
+        # (image, planet position) or None by tile column and row, view position of the last frame
+        self.tiles = dict()
+        self.last = None
+
+    # (image, screen position) pairs of the tiles in the view (left, top, width, height relative to the planet
+    # center), empty if nothing of the planet is visible
+    def render(self, left, top, width, height):
+        left, top = int(math.floor(left)), int(math.floor(top))
+        view = pygame.Rect(left, top, width, height)
+        if not view.colliderect(self.bounds):
+            self.last = None
+            return []
+
+        # tiles are drawn and kept ahead of the view as far as it moved during the last frame, so at any speed
+        # the next frame finds its tiles drawn; a jump further than the screen size is not followed
+        ahead = view
+        if self.last is not None:
+            ahead = view.union(view.move(max(-width, min(width, left - self.last[0])),
+                                         max(-height, min(height, top - self.last[1]))))
+        self.last = left, top
+
+        self.tiles = {index: self.tiles[index] if index in self.tiles else self.draw(*index)
+                      for index in self.indexes(ahead.inflate(self.margin * 2, self.margin * 2))}
+
+        return [(image, (x - left, y - top)) for image, (x, y) in filter(None, map(self.tiles.get, self.indexes(view)))]
+
+    def indexes(self, rect):
+        rect = rect.clip(self.bounds)
+        return [(i, j) for i in range(rect.left // self.tile, -(-rect.right // self.tile))
+                for j in range(rect.top // self.tile, -(-rect.bottom // self.tile))]
+
+    def draw(self, i, j):
+        window = pygame.Rect(i * self.tile, j * self.tile, self.tile, self.tile).clip(self.bounds)
+        nearest = math.hypot(min(max(0, window.left), window.right - 1), min(max(0, window.top), window.bottom - 1))
+        if nearest > self.radius:
+            return None
+
+        # the disc covers the whole tile, nothing of the atmosphere shows through
+        disc = self.draw_disc(window)
+        if disc is not None and disc[0].get_size() == window.size and disc[0].get_colorkey() is None:
+            return disc[0], window.topleft
+
+        image = pygame.Surface(window.size, pygame.SRCALPHA, 32)
+        image.fill((0, 0, 0, 0))
+
+        if self.atmosphere_height and self.atmosphere_color < len(ATMOSPHERE_COLORS):
+            self.draw_atmosphere(image, window)
+
+        if disc is not None:
+            image.blit(*disc)
+
+        return image, window.topleft
+
+    # rings are circles of radius - h for h in range(0, atmosphere_height, 5) with alpha h * (255 // height),
+    # a pixel takes the alpha of the smallest circle which covers it
+    def draw_atmosphere(self, image, window):
+        height = self.atmosphere_height
+        color = ATMOSPHERE_COLORS[self.atmosphere_color]
+
+        # inside the smallest circle every pixel has the same alpha
+        farthest = math.hypot(max(-window.left, window.right - 1), max(-window.top, window.bottom - 1))
+        if self.radius - farthest >= height:
+            image.fill(color + ((height - 1) // 5 * 5 * (255 // height),))
+            return None
+
+        image.fill(color + (0,))
+        x = np.arange(window.left, window.right, dtype=np.float32)
+        y = np.arange(window.top, window.bottom, dtype=np.float32)
+        reach = self.radius - np.sqrt(x[:, None] ** 2 + y[None, :] ** 2)
+        alpha = np.where(reach >= 0, np.minimum(height - 1, reach) // 5 * 5 * (255 // height), 0)
+
+        pixels = pygame.surfarray.pixels_alpha(image)
+        pixels[:] = alpha
+        del pixels
+
+    # texture of the part of the disc in the window and its position in the window, None if there is no such part;
+    # it is colorkeyed only if some of its pixels are transparent
+    def draw_disc(self, window):
+        disc, texture = self.disc, self.texture
+        part = window.clip(pygame.Rect(-disc, -disc, disc * 2, disc * 2))
+        if not part.width or not part.height:
+            return None
+
+        # texel of every pixel as if the texture was scaled to the whole disc, so tiles meet without seams
+        columns = (np.arange(part.left, part.right) + disc) * texture.get_width() // (disc * 2)
+        rows = (np.arange(part.top, part.bottom) + disc) * texture.get_height() // (disc * 2)
+        texels = self.texels.take(columns, axis=0).take(rows, axis=1)
+
+        image = pygame.Surface(part.size, 0, texture)
+        pygame.surfarray.blit_array(image, texels)
+        if self.key is not None and (texels == self.key).any():
+            image.set_colorkey(texture.get_colorkey())
+
+        return image, (part.left - window.left, part.top - window.top)
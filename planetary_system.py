@@ -1,30 +1,36 @@
 import pygame
 import math
-import os
 import copy
 import random
 import datetime as dt
 import sqlite3
 from math import atan2, degrees, pi
+from gravity import GravityEngine, gravity_view
+from trajectory import RollingPredictor
+from ephemeris import Ephemeris
+from planner import ManeuverPlanner
+from intercept import InterceptSolver
+from projectiles import ProjectileManager
+from enemy_ai import EnemyAI
+from rotation import blit_rotate
+from assets import ASSETS
+from planet_view import PlanetView
+from viewport import Viewport
+from hud import HudLayer, draw_bar, draw_magazine
+from text_cache import TEXTS
+from starfield import Starfield
+from particles import ParticleEngine
+from orbit_paths import OrbitPath, ZOOM_STEP
+from layers import grid
 
 GRAVITY = 100
 FPS = 60
 MAP_SIZE = 100
+MAP_ZOOM = (-12, 8)
 con = sqlite3.connect("game_database.db")
 
-
-def load_image(name, color_key=None):
-    fullname = os.path.join('data', name)
-    image = pygame.image.load(fullname).convert()
-
-    if color_key is not None:
-        if color_key == -1:
-            color_key = image.get_at((0, 0))
-        image.set_colorkey(color_key)
-    else:
-        image = image.convert_alpha()
-
-    return image
+# image of sprites which draw themselves straight onto the surface
+NO_IMAGE = pygame.Surface((0, 0))
 
 
 class PlanetarySystem:
@@ -35,18 +41,29 @@ class PlanetarySystem:
         self.surface = pygame.Surface(size)
 
         self.all_view_sprites = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
         self.enemies = pygame.sprite.Group()
+        self.enemy_ai = EnemyAI()
         self.map_mode = False
+        self.map_level = 0
+        self.map_size = MAP_SIZE
+        self.viewport = Viewport()
         pygame.mouse.set_visible(False)
 
         self.hero = None
         self.objects = []
-
-        self.background = self.draw_background()
-        self.stars = []
-        self.create_stars()
+        self.planets = []
+        self.gravity_engine = GravityEngine(GRAVITY, FPS)
+        self.ephemeris = Ephemeris(self.gravity_engine)
+        self.bullets = ProjectileManager(self.gravity_engine, self.ephemeris)
+        self.particles = ParticleEngine()
+
+        self.background = grid(self.surface.get_size())
+        self.stars = Starfield(self.surface.get_size())
         self.simulation_points = []
+        self.predictor = RollingPredictor()
+        self.intercepts = InterceptSolver(self.gravity_engine, self.predictor)
+        self.suggested_burn = None
+        self.suggested_burn_time = 0
 
         self.enemies_counter = 0
         self.win = 0
@@ -58,28 +75,34 @@ class PlanetarySystem:
         self.arrows = pygame.sprite.Group()
         self.arrows_list = {}
 
+    # the trajectory worker does not step while a frame is computed
     def update(self):
+        self.predictor.predictor.pause()
+        self.frame()
+        self.predictor.predictor.resume()
+
+    def frame(self):
         self.surface.fill('black')
         if self.win:
             self.surface.blit(self.background, (0, 0))
-            self.surface.blit(self.font.render('all enemies destroyed', True, 'green'), (20, 20))
-            self.surface.blit(self.font.render('your time: ' +
-                                               str(self.win // 3600) +
-                                               ':' +
-                                               str((self.win % 3600) // 60) +
-                                               ':' + str((self.win % 3600) % 60),
-                                               True, 'green'), (20, 42))
-            self.surface.blit(self.font.render('press any key to continue', True, 'green'), (20, 64))
+            self.surface.blit(TEXTS.render(self.font, 'all enemies destroyed', True, 'green'), (20, 20))
+            self.surface.blit(TEXTS.render(self.font, 'your time: ' +
+                                           str(self.win // 3600) +
+                                           ':' +
+                                           str((self.win % 3600) // 60) +
+                                           ':' + str((self.win % 3600) % 60),
+                                           True, 'green'), (20, 42))
+            self.surface.blit(TEXTS.render(self.font, 'press any key to continue', True, 'green'), (20, 64))
             self.draw_cursor()
 
             return None
 
         if self.hero.destroyed:
             self.surface.blit(self.background, (0, 0))
-            self.surface.blit(self.font.render('no signal', True, 'green'), (20, 20))
-            self.surface.blit(self.font.render('transmitter not responding', True, 'green'), (20, 42))
-            self.surface.blit(self.font.render('reboot failed', True, 'green'), (20, 64))
-            self.surface.blit(self.font.render('press any key to continue', True, 'green'), (20, 86))
+            self.surface.blit(TEXTS.render(self.font, 'no signal', True, 'green'), (20, 20))
+            self.surface.blit(TEXTS.render(self.font, 'transmitter not responding', True, 'green'), (20, 42))
+            self.surface.blit(TEXTS.render(self.font, 'reboot failed', True, 'green'), (20, 64))
+            self.surface.blit(TEXTS.render(self.font, 'press any key to continue', True, 'green'), (20, 86))
             self.draw_cursor()
 
             return None
@@ -90,14 +113,23 @@ class PlanetarySystem:
         else:
             self.draw_stars()
 
-        self.all_view_sprites.draw(self.surface)
-        self.all_view_sprites.update(self)
+        self.update_prediction()
+        self.intercepts.update(self.hero, self.enemies_list, self.time_counter)
 
+        self.viewport.update(self.surface, self.hero, self.map_mode, self.map_size)
+        self.surface.blits([tile for planet in self.planets if planet.visible for tile in planet.tiles], doreturn=False)
+        self.draw_visible(self.all_view_sprites)
+        self.all_view_sprites.update(self)
         if not self.map_mode:
-            self.bullets.draw(self.surface)
+            self.particles.update()
+            self.surface.blits(self.particles.drawable(self.viewport), doreturn=False)
+
         self.bullets.update(self)
+        if not self.map_mode:
+            self.surface.blits(self.bullets.drawable(self.viewport), doreturn=False)
 
-        self.enemies.draw(self.surface)
+        self.enemy_ai.update(self.enemies_list, self.hero, self.bullets, self.viewport)
+        self.draw_visible(self.enemies)
         self.enemies.update(self)
 
         if not self.map_mode:
@@ -105,14 +137,18 @@ class PlanetarySystem:
         self.arrows.update(self)
 
         if self.map_mode:
-            self.surface.blit(self.font.render('MAP mode', True, 'green'), (20, 20))
+            self.surface.blit(TEXTS.render(self.font, 'MAP mode', True, 'green'), (20, 20))
             self.draw_cursor()
+            self.simulation_points = [self.to_map(x, y) for x, y in self.predictor.path()]
             for point in self.simulation_points:
                 pygame.draw.circle(self.surface, (0, 100, 0), point, 1)
 
+            self.draw_suggested_burn()
+
         else:
-            self.hero.draw_interface(self)
-            self.surface.blit(self.hero.interface_surface, (0, 0))
+            self.surface.blits(self.hero.draw_interface(self), doreturn=False)
+
+        self.gravity_engine.step(self.game_speed)
 
         if self.enemies_counter == 0:
             self.win = self.time_counter // FPS
@@ -137,6 +173,8 @@ class PlanetarySystem:
                                        str(line[5]),
                                        int(line[6]),
                                        int(line[7])))
+            self.gravity_engine.add(self.objects[-1], attractor=True)
+            self.planets.append(self.objects[-1])
 
         elif line[0] == 'moon':
             self.objects.append(Moon(self.all_view_sprites,
@@ -149,6 +187,9 @@ class PlanetarySystem:
                                      str(line[6]),
                                      int(line[7]),
                                      int(line[8])))
+            self.gravity_engine.add(self.objects[-1], attractor=True, parent=self.objects[0], rails=True)
+            self.ephemeris.add(self.objects[-1])
+            self.planets.append(self.objects[-1])
 
         elif line[0] == 'enemy':
             self.objects.append(Enemy(self.enemies,
@@ -178,6 +219,10 @@ class PlanetarySystem:
         for el in self.enemies_list:
             self.arrows_list[el] = Arrow(self.hero, el, self.arrows)
 
+    # sprites culled in their last update are not blitted
+    def draw_visible(self, group):
+        self.surface.blits([(sprite.image, sprite.rect) for sprite in group if sprite.visible], doreturn=False)
+
     def draw_cursor(self, rect_size=10):
         pygame.draw.rect(self.surface, 'green', (pygame.mouse.get_pos()[0] - rect_size // 2,
                                                  pygame.mouse.get_pos()[1] - rect_size // 2,
@@ -197,76 +242,64 @@ class PlanetarySystem:
                          (pygame.mouse.get_pos()[0], self.surface.get_size()[1]),
                          (pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1] + rect_size // 2))
 
-    def draw_background(self):
-        grid_surface = pygame.Surface(self.surface.get_size(), pygame.SRCALPHA, 32)
-        grid_surface.fill((0, 0, 0, 0))
-        for i in range(1, 160):
-            pygame.draw.line(grid_surface, (0, 15, 0), (i * 9, 0), (i * 9, self.surface.get_height()))
-
-        for i in range(1, 100):
-            pygame.draw.line(grid_surface, (0, 15, 0), (0, i * 9), (self.surface.get_width(), i * 9))
+    def draw_stars(self):
+        self.stars.move(self.hero.speed_x * self.game_speed, self.hero.speed_y * self.game_speed)
+        self.stars.draw(self.surface)
 
-        for i in range(1, 16):
-            pygame.draw.line(grid_surface, (0, 35, 0), (i * 90, 0), (i * 90, self.surface.get_height()))
+    def to_map(self, x, y):
+        return self.surface.get_width() // 2 + x / self.map_size, self.surface.get_height() // 2 + y / self.map_size
 
-        for i in range(1, 10):
-            pygame.draw.line(grid_surface, (0, 35, 0), (0, i * 90), (self.surface.get_width(), i * 90))
+    # map scale moves in zoom levels ZOOM_STEP apart, negative steps zoom in
+    def zoom(self, steps):
+        self.map_level = min(MAP_ZOOM[1], max(MAP_ZOOM[0], self.map_level + steps))
+        self.map_size = MAP_SIZE * ZOOM_STEP ** self.map_level
 
-        return grid_surface
+    def update_prediction(self):
+        bodies = [object.body for object in self.objects if type(object) == Moon] + [self.hero.body]
+        self.predictor.update(self.gravity_engine, bodies, self.hero.body, self.time_counter)
 
-    def create_stars(self):
-        for i in range(100):
-            x = random.randrange(0, self.surface.get_width())
-            y = random.randrange(0, self.surface.get_height())
-            luminosity = random.randrange(50, 255)
-            size = random.randrange(1, 3)
-            self.stars.append([x, y, luminosity, size])
+    def suggest_burn(self):
+        target = min(self.enemies_list, key=lambda enemy: enemy.hero_distanse(self.hero), default=None)
 
-    def draw_stars(self):
-        for star in self.stars:
-            star[0] -= self.hero.speed_x * star[2] / 50000 * self.game_speed
-            star[1] -= self.hero.speed_y * star[2] / 50000 * self.game_speed
+        planner = ManeuverPlanner(self.gravity_engine, self.ephemeris, self.planets)
+        burns = planner.plan(self.hero.body, range(0, 360, 15), (10, 20, 40, 80, 160), (0, 300, 600, 1200),
+                             target=target, count=1)
 
-            if - 10 > star[0]:
-                star[0] = self.surface.get_width()
-                star[1] = random.randrange(0, self.surface.get_height())
+        self.suggested_burn = burns[0] if burns else None
+        self.suggested_burn_time = self.gravity_engine.time
 
-            elif star[0] > self.surface.get_width() + 10:
-                star[0] = 0
-                star[1] = random.randrange(0, self.surface.get_height())
+    def draw_suggested_burn(self):
+        burn = self.suggested_burn
+        if burn is None:
+            return None
 
-            if - 10 > star[1]:
-                star[1] = self.surface.get_height()
-                star[0] = random.randrange(0, self.surface.get_width())
+        start = (burn.start - (self.gravity_engine.time - self.suggested_burn_time)) / FPS
+        if start < -5:
+            self.suggested_burn = None
+            return None
 
-            elif star[1] > self.surface.get_height() + 10:
-                star[1] = 0
-                star[0] = random.randrange(0, self.surface.get_width())
+        for point in burn.path:
+            pygame.draw.circle(self.surface, (100, 100, 0), self.to_map(*point), 1)
 
-            pygame.draw.circle(self.surface, (star[2], star[2], star[2]), (star[0], star[1]), star[3])
+        text = 'burn ' + str(int(burn.delta_v)) + ' at ' + str(int(burn.angle)) + ' deg in ' + \
+               str(max(0, int(start))) + ' s'
+        self.surface.blit(TEXTS.render(self.font, text, True, 'green'), (20, 42))
 
+    # the path is kept up to date in map mode, this only forces a full prediction
     def simulation(self):
-        points = []
-        counter = 0
-        simulation_objects = list(map(lambda x: VirtualObject(x),
-                                      list(filter(lambda x: type(x) == Planet or
-                                                            type(x) == Moon or
-                                                            type(x) == Spaceship, self.objects))))
-
-        simulation_objects.append(VirtualObject(self.hero))
-        for step in range(2500):
-            counter = (counter + 1) % 10
-            for object in simulation_objects:
-                if type(object.parent) == Spaceship and not counter:
-                    points.append((self.surface.get_width() // 2 + object.x / MAP_SIZE,
-                                   self.surface.get_height() // 2 + object.y / MAP_SIZE))
+        self.predictor.invalidate()
 
-                object.move(10, simulation_objects)
 
-        self.simulation_points = points
+class PhysicalObject:
+    # set by GravityEngine.add, until then the object keeps its own state
+    gravity_engine = None
+    body = None
 
+    x = gravity_view('x', 'positions', 0)
+    y = gravity_view('y', 'positions', 1)
+    speed_x = gravity_view('speed_x', 'velocities', 0)
+    speed_y = gravity_view('speed_y', 'velocities', 1)
 
-class PhysicalObject:
     def __init__(self, x, y, speed_x, speed_y):
         self.render_counter = 0
 
@@ -298,8 +331,13 @@ class PhysicalObject:
         return position[0], position[1], speed[0], speed[1]
 
     def physical_move(self, game_speed, a_x=0, a_y=0, planets=[]):
+        # bodies in the engine are moved together in PlanetarySystem.update
+        if self.gravity_engine is not None:
+            self.gravity_engine.request_move(self.body, a_x, a_y)
+            return None
+
         for planet in planets:
-            if type(planet) != Planet and type(planet) != Moon and type(planet) != VirtualObject:
+            if type(planet) != Planet and type(planet) != Moon:
                 continue
 
             if planet.mass != 0:
@@ -328,42 +366,27 @@ class EngineObject:
         self.engine_particle_life = engine_particle_life
         self.engine_position = engine_position
 
-        self.engine_particles = []
         self.engine_particles_counter = 0
 
-    def engine_on(self, game_speed):
-        if game_speed != 1:
+    def engine_on(self, system):
+        if system.game_speed != 1:
             return 0, 0
 
         if self.engine_particles_counter == 0:
-            self.engine_particles.append(
-                [(self.x - self.engine_position[0] * math.cos(math.radians(self.angle + self.engine_position[1])),
-                  self.y - self.engine_position[0] * math.sin(math.radians(self.angle + self.engine_position[1]))),
-                 ((self.speed_x - self.engine_particle_speed * math.cos(math.radians(
-                     self.angle + random.randrange(-self.engine_particle_angle, self.engine_particle_angle)))) / FPS,
-                  (self.speed_y - self.engine_particle_speed * math.sin(math.radians(
-                      self.angle + random.randrange(-self.engine_particle_angle, self.engine_particle_angle)))) / FPS),
-                 self.engine_particle_life + random.randrange(-10, 10)])
+            system.particles.spawn(
+                system.particles.palette(self.begin_color, self.end_color, self.engine_particle_life),
+                self.x - self.engine_position[0] * math.cos(math.radians(self.angle + self.engine_position[1])),
+                self.y - self.engine_position[0] * math.sin(math.radians(self.angle + self.engine_position[1])),
+                (self.speed_x - self.engine_particle_speed * math.cos(math.radians(
+                    self.angle + random.randrange(-self.engine_particle_angle, self.engine_particle_angle)))) / FPS,
+                (self.speed_y - self.engine_particle_speed * math.sin(math.radians(
+                    self.angle + random.randrange(-self.engine_particle_angle, self.engine_particle_angle)))) / FPS,
+                self.engine_particle_life + random.randrange(-10, 10))
+        self.engine_particles_counter = (self.engine_particles_counter + 1) % 2
 
         return self.max_thrust * math.cos(math.radians(self.angle)), \
                self.max_thrust * math.sin(math.radians(self.angle))
 
-    def update_and_render_engine_particles(self, surface):
-        self.engine_particles_counter = (self.engine_particles_counter + 1) % 2
-
-        self.engine_particles = list(
-            map(lambda x: [(x[0][0] + x[1][0], x[0][1] + x[1][1]), x[1], x[2] - 1], self.engine_particles))
-        self.engine_particles = list(filter(lambda x: x[2] > 3, self.engine_particles))
-
-        centre_x = surface.get_width() // 2
-        centre_y = surface.get_height() // 2
-
-        for i, particle in enumerate(self.engine_particles):
-            pygame.draw.circle(surface, self.calculate_particle_color(particle),
-                               (particle[0][0] - self.x + centre_x,
-                                particle[0][1] - self.y + centre_y), 3, 0)
-        # self.draw_speed_vector(surface)
-
     def draw_speed_vector(self, surface):
         import math
         rad = math.pi / 180
@@ -382,48 +405,18 @@ class EngineObject:
                                                (end[0] + trirad * math.sin(rotation + 120 * rad),
                                                 end[1] + trirad * math.cos(rotation + 120 * rad))))
 
-    def calculate_particle_color(self, particle):
-        new_color = []
-        for i in range(3):
-            new_color.append(
-                (self.begin_color[i] * particle[2] + self.end_color[i] * (self.engine_particle_life - particle[2])) / (
-                        self.engine_particle_life + 10))
-
-        return tuple(new_color)
-
 
 class Arrow(pygame.sprite.Sprite):
     def __init__(self, hero, enemy, group):
         pygame.sprite.Sprite.__init__(self, group)
         self.hero = hero
         self.enemy = enemy
-        self.or_image = load_image('arrow.png')
-        self.or_image = pygame.transform.scale(self.or_image, (10, 10))
+        self.or_image = ASSETS.image('arrow.png', (10, 10))
         self.rect = self.or_image.get_rect()
         self.image = self.or_image
 
     def blitRotate(self, pos, originPos, angle, image):
-
-        angle = - angle - 90
-        # calcaulate the axis aligned bounding box of the rotated image
-        w, h = image.get_size()
-        box = [pygame.math.Vector2(p) for p in [(0, 0), (w, 0), (w, -h), (0, -h)]]
-        box_rotate = [p.rotate(angle) for p in box]
-        min_box = (min(box_rotate, key=lambda p: p[0])[0], min(box_rotate, key=lambda p: p[1])[1])
-        max_box = (max(box_rotate, key=lambda p: p[0])[0], max(box_rotate, key=lambda p: p[1])[1])
-
-        # calculate the translation of the pivot
-        pivot = pygame.math.Vector2(originPos[0], -originPos[1])
-        pivot_rotate = pivot.rotate(angle)
-        pivot_move = pivot_rotate - pivot
-
-        # calculate the upper left origin of the rotated image
-        origin = (
-            pos[0] - originPos[0] + min_box[0] - pivot_move[0], pos[1] - originPos[1] - max_box[1] + pivot_move[1])
-
-        # get a rotated image
-        self.image = pygame.transform.rotate(image, angle)
-
+        self.image, origin = blit_rotate(pos, originPos, angle, image)
         return origin
 
     def get_angle(self):
@@ -465,11 +458,9 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
         PhysicalObject.__init__(self, x, y, speed_x=speed_x, speed_y=speed_y)
         EngineObject.__init__(self, angle, begin_color=(0, 255, 250))
 
-        self.or_image = load_image("spaceship.png", -1)
-        self.or_image = pygame.transform.scale(self.or_image, (40, 40))
+        self.or_image = ASSETS.image("spaceship.png", (40, 40), -1)
 
-        self.or_map_image = load_image("spaceship_on_map.png", -1)
-        self.or_map_image = pygame.transform.scale(self.or_map_image, (20, 20))
+        self.or_map_image = ASSETS.image("spaceship_on_map.png", (20, 20), -1)
 
         self.rect = self.or_image.get_rect()
         self.image = self.or_image
@@ -479,8 +470,9 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
         self.collision_radius = collision_radius
         self.destroyed = None
         self.weapons = dict()
-        self.interface_surface = pygame.surface.Surface((0, 0))
+        self.hud = HudLayer()
         self.hp = 60
+        self.visible = True
         self.arrows = pygame.sprite.Group()
 
     def fire(self, id):
@@ -492,10 +484,10 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
 
     def update(self, system):
         if not self.destroyed and not system.win:
-            dmg = pygame.sprite.spritecollideany(self, system.bullets)
-            if dmg and dmg.timer > 30:
-                self.hp -= dmg.damage
-                dmg.destroy()
+            hit = system.bullets.collide(self.x, self.y, self.collision_radius, min_timer=30)
+            if hit is not None:
+                self.hp -= system.bullets.damages[hit]
+                system.bullets.destroy(hit)
 
             if self.hp <= 0:
                 self.destroyed = True
@@ -507,7 +499,7 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
             keys = pygame.key.get_pressed()
 
             if keys[pygame.K_SPACE]:
-                a_x, a_y = self.engine_on(system.game_speed)
+                a_x, a_y = self.engine_on(system)
 
             if keys[pygame.K_f]:
                 self.fire(1)
@@ -529,7 +521,7 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
             self.render_on_view(system.surface)
 
         else:
-            self.render_on_map(system.surface)
+            self.render_on_map(system.surface, system.map_size)
 
         for key in self.weapons.keys():
             self.weapons[key].update()
@@ -557,36 +549,14 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
     def render_on_view(self, surface):
         self.rect.x, self.rect.y = self.blitRotate((surface.get_width() // 2, surface.get_height() // 2), (20, 20),
                                                    self.angle, self.or_image)
-        self.update_and_render_engine_particles(surface)
 
-    def render_on_map(self, surface):
-        self.rect.x, self.rect.y = self.blitRotate((surface.get_width() // 2 + self.x / MAP_SIZE,
-                                                    surface.get_height() // 2 + self.y / MAP_SIZE),
+    def render_on_map(self, surface, map_size=MAP_SIZE):
+        self.rect.x, self.rect.y = self.blitRotate((surface.get_width() // 2 + self.x / map_size,
+                                                    surface.get_height() // 2 + self.y / map_size),
                                                    (10, 10), self.angle + 45, self.or_map_image)
 
-    # ЭТУ ФУНКЦИЮ Я ЧЕСТНОГО УКРАЛ
     def blitRotate(self, pos, originPos, angle, image):
-
-        angle = - angle - 90
-        # calcaulate the axis aligned bounding box of the rotated image
-        w, h = image.get_size()
-        box = [pygame.math.Vector2(p) for p in [(0, 0), (w, 0), (w, -h), (0, -h)]]
-        box_rotate = [p.rotate(angle) for p in box]
-        min_box = (min(box_rotate, key=lambda p: p[0])[0], min(box_rotate, key=lambda p: p[1])[1])
-        max_box = (max(box_rotate, key=lambda p: p[0])[0], max(box_rotate, key=lambda p: p[1])[1])
-
-        # calculate the translation of the pivot
-        pivot = pygame.math.Vector2(originPos[0], -originPos[1])
-        pivot_rotate = pivot.rotate(angle)
-        pivot_move = pivot_rotate - pivot
-
-        # calculate the upper left origin of the rotated image
-        origin = (
-            pos[0] - originPos[0] + min_box[0] - pivot_move[0], pos[1] - originPos[1] - max_box[1] + pivot_move[1])
-
-        # get a rotated image
-        self.image = pygame.transform.rotate(image, angle)
-
+        self.image, origin = blit_rotate(pos, originPos, angle, image)
         return origin
 
     def collision_with_planet(self, planet):
@@ -597,32 +567,28 @@ class Spaceship(pygame.sprite.Sprite, PhysicalObject, EngineObject):
             self.destroyed = planet, delta_x, delta_y
             self.marker_on = False
 
+    # (surface, position) pairs of the interface, parts are drawn again only when they change
     def draw_interface(self, system):
-        self.interface_surface = pygame.surface.Surface(system.surface.get_size(), pygame.SRCALPHA, 32)
-        self.interface_surface.fill((0, 0, 0, 0))
+        width, height = system.surface.get_size()
 
         for i, key in enumerate(self.weapons.keys()):
             weapon = self.weapons[key]
-            self.interface_surface.blit(weapon.image,
-                                        (self.interface_surface.get_width() - (i + 1) * 140,
-                                         self.interface_surface.get_height() - 240))
-
-            for j in range(weapon.magazine_size):
-                if j < weapon.magazine_filling:
-                    self.interface_surface.blit(weapon.bullet_image,
-                                                (self.interface_surface.get_width() - (i + 1) * 140 + 100,
-                                                 self.interface_surface.get_height() - 240 + j * weapon.bullet_image.get_height()))
+            x, y = width - (i + 1) * 140, height - 240
+            self.hud.part(('weapon', key), weapon.image, (x, y), lambda: weapon.image)
+            self.hud.part(('magazine', key), (weapon.magazine_filling, weapon.magazine_size), (x + 100, y),
+                          lambda: draw_magazine(weapon))
 
-                else:
-                    self.interface_surface.blit(weapon.bullet_image_hollow,
-                                                (self.interface_surface.get_width() - (i + 1) * 140 + 100,
-                                                 self.interface_surface.get_height() - 240 + j * weapon.bullet_image.get_height()))
+        self.hud.part('hp', self.hp, (20, 20), lambda: draw_bar(max(0, self.hp), 'red'))
+        self.hud.part('enemies', system.enemies_counter, (20, 42),
+                      lambda: draw_bar(max(0, system.enemies_counter), 'white'))
 
-        for i in range(self.hp):
-            pygame.draw.rect(self.interface_surface, 'red', (20 + i * 10, 20, 8, 20))
+        approach = system.intercepts.nearest()
+        if approach is not None:
+            text = 'closest approach: ' + str(int(approach[1])) + ' in ' + \
+                   str(max(0, int((approach[0] - system.time_counter) / FPS))) + ' s'
+            self.hud.part('approach', text, (20, 64), lambda: TEXTS.render(system.font, text, True, 'green'))
 
-        for i in range(system.enemies_counter):
-            pygame.draw.rect(self.interface_surface, 'white', (20 + i * 10, 42, 8, 20))
+        return self.hud.blits()
 
 
 class Planet(pygame.sprite.Sprite):
@@ -635,60 +601,33 @@ class Planet(pygame.sprite.Sprite):
         self.atmosphere_height = atmosphere_height
         self.atmosphere_color = atmosphere_color
 
-        self.or_map_image = pygame.surface.Surface((radius * 2 // MAP_SIZE, radius * 2 // MAP_SIZE), pygame.SRCALPHA,
-                                                   32)
-        self.or_map_image.fill((0, 0, 0, 0))
-        pygame.draw.circle(self.or_map_image, 'green',
-                           (radius // MAP_SIZE, radius // MAP_SIZE),
-                           radius // MAP_SIZE, 1)
-
-        self.or_image = self.draw_planet(filename, atmosphere_height)
-        self.image = self.or_image
+        self.view = PlanetView(ASSETS.image(filename, color_key=-1), radius, atmosphere_height, atmosphere_color)
+        self.image = NO_IMAGE
         self.rect = self.image.get_rect()
+        self.tiles = []
+        self.visible = True
 
     def update(self, system):
+        self.visible = system.viewport.contains(self.x, self.y, self.radius)
+        if not self.visible:
+            return None
+
         if not system.map_mode:
             self.render_on_view(system.surface, system.hero)
 
         else:
-            self.render_on_map(system.surface)
+            self.render_on_map(system.surface, system.map_size)
 
     def render_on_view(self, surface, hero):
-        self.image = self.or_image
-        self.rect.x, self.rect.y = self.x - hero.x - self.radius + surface.get_width() // 2, \
-                                   self.y - hero.y - self.radius + surface.get_height() // 2
-
-    def render_on_map(self, surface):
-        self.image = self.or_map_image
-        self.rect.x, self.rect.y = surface.get_width() // 2 + (self.x - self.radius) / MAP_SIZE, \
-                                   surface.get_height() // 2 + (self.y - self.radius) / MAP_SIZE
-
-    def draw_planet(self, filename, atmosphere_height):
-        image = pygame.surface.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA, 32)
-        image.fill((0, 0, 0, 0))
-        planet = load_image(filename, -1)
-        planet = pygame.transform.scale(planet, ((self.radius - atmosphere_height) * 2,
-                                                 (self.radius - atmosphere_height) * 2))
-
-        if atmosphere_height:
-            for h in range(0, atmosphere_height, 5):
-                if self.atmosphere_color == 0:
-                    pygame.draw.circle(image, (10, 50, 100, h * (255 // atmosphere_height)),
-                                    (self.radius, self.radius),
-                                    self.radius - h)
-
-                elif self.atmosphere_color == 1:
-                    pygame.draw.circle(image, (100, 10, 10, h * (255 // atmosphere_height)),
-                                    (self.radius, self.radius),
-                                    self.radius - h)
-
-                elif self.atmosphere_color == 2:
-                    pygame.draw.circle(image, (100, 100, 10, h * (255 // atmosphere_height)),
-                                    (self.radius, self.radius),
-                                    self.radius - h)
-
-        image.blit(planet, (atmosphere_height, atmosphere_height))
-        return image
+        width, height = surface.get_size()
+        self.tiles = self.view.render(hero.x - width // 2 - self.x, hero.y - height // 2 - self.y, width, height)
+        self.visible = bool(self.tiles)
+
+    # outlines are drawn at any zoom straight onto the map instead of keeping a map image per zoom level
+    def render_on_map(self, surface, map_size=MAP_SIZE):
+        self.tiles = []
+        pygame.draw.circle(surface, 'green', (surface.get_width() // 2 + self.x / map_size,
+                                              surface.get_height() // 2 + self.y / map_size), self.radius / map_size, 1)
 
 
 class Moon(Planet, PhysicalObject):
@@ -704,7 +643,8 @@ class Moon(Planet, PhysicalObject):
 
         Planet.__init__(self, group, x, y, radius, mass, filename, atmosphere_height, atmosphere_color)
         PhysicalObject.__init__(self, x, y, speed_x, speed_y)
-        self.ellipse_surface, self.ellipse_surface_delta = self.draw_ellipse()
+        self.orbit = OrbitPath()
+        self.orbit.set_elements(*self.orbit_elements())
 
     def start_position_calculation(self):
         return self.start_height * math.cos(math.radians(self.apsis_argument)), \
@@ -715,96 +655,29 @@ class Moon(Planet, PhysicalObject):
                self.start_speed * math.sin(math.radians(self.apsis_argument + 90))
 
     def update(self, system):
+        self.visible = system.viewport.contains(self.x, self.y, self.radius)
         if not system.map_mode:
-            self.render_on_view(system.surface, system.hero)
+            if self.visible:
+                self.render_on_view(system.surface, system.hero)
 
         else:
-            self.render_on_map(system.surface)
+            self.render_on_map(system.surface, system.map_size)
 
         self.physical_move(system.game_speed, planets=[self.orbit_parent])
 
-    def render_on_map(self, surface):
-        self.image = self.or_map_image
-        self.rect.x, self.rect.y = surface.get_width() // 2 + (self.x - self.radius) / MAP_SIZE, \
-                                   surface.get_height() // 2 + (self.y - self.radius) / MAP_SIZE
-
-        surface.blit(self.ellipse_surface, (self.ellipse_surface_delta[0] + surface.get_width() // 2,
-                                            self.ellipse_surface_delta[1] + surface.get_height() // 2))
-
-    def draw_ellipse(self):
-        distanse = (self.x ** 2 + self.y ** 2) ** 0.5
-
-        a = 1 / (2 / distanse - self.start_speed ** 2 / (GRAVITY * self.orbit_parent.mass * FPS))
-        e = (a - distanse) / a
-        b = a * (1 - e ** 2) ** 0.5
-
-        apoapsis = a * (1 + e)
-        periapsis = a * (1 - e)
-
-        ellipse_surface = pygame.Surface((int(a * 2) // MAP_SIZE, int(b * 2) // MAP_SIZE), pygame.SRCALPHA, 32)
-        ellipse_surface.fill((0, 0, 0, 0))
-
-        pygame.draw.ellipse(ellipse_surface, (0, 100, 0), (0, 0, int(a * 2) // MAP_SIZE, int(b * 2) // MAP_SIZE), 1)
-
-        delta_x = apoapsis // MAP_SIZE
-        delta_y = b // MAP_SIZE
-
-        ellipse_surface, x, y = self.blitRotate((0, 0), (delta_x, delta_y), self.apsis_argument, ellipse_surface)
-        print(apoapsis, periapsis, self.start_speed, self.apsis_argument, delta_x, delta_y)
-
-        return ellipse_surface, (x, y)
-
-    def blitRotate(self, pos, originPos, angle, or_image):
+    def render_on_map(self, surface, map_size=MAP_SIZE):
+        Planet.render_on_map(self, surface, map_size)
+        pygame.draw.lines(surface, (0, 100, 0), True,
+                          self.orbit.points(surface.get_width() // 2 + self.orbit_parent.x / map_size,
+                                            surface.get_height() // 2 + self.orbit_parent.y / map_size, map_size))
 
-        angle = - angle
-        # calcaulate the axis aligned bounding box of the rotated image
-        w, h = or_image.get_size()
-        box = [pygame.math.Vector2(p) for p in [(0, 0), (w, 0), (w, -h), (0, -h)]]
-        box_rotate = [p.rotate(angle) for p in box]
-        min_box = (min(box_rotate, key=lambda p: p[0])[0], min(box_rotate, key=lambda p: p[1])[1])
-        max_box = (max(box_rotate, key=lambda p: p[0])[0], max(box_rotate, key=lambda p: p[1])[1])
+    # semi-major axis, eccentricity and apsis argument of the orbit around the parent
+    def orbit_elements(self):
+        a = 1 / (2 / self.start_height - self.start_speed ** 2 / (GRAVITY * self.orbit_parent.mass * FPS))
+        return a, (a - self.start_height) / a, self.apsis_argument
 
-        # calculate the translation of the pivot
-        pivot = pygame.math.Vector2(originPos[0], -originPos[1])
-        pivot_rotate = pivot.rotate(angle)
-        pivot_move = pivot_rotate - pivot
 
-        # calculate the upper left origin of the rotated image
-        origin_x, origin_y = pos[0] - originPos[0] + min_box[0] - pivot_move[0], pos[1] - originPos[1] - max_box[1] + \
-                             pivot_move[1]
-
-        # get a rotated image
-        image = pygame.transform.rotate(or_image, angle)
-
-        return image, origin_x, origin_y
-
-
-class VirtualObject(PhysicalObject):
-    def __init__(self, parent):
-        self.parent = parent
-        self.x = parent.x
-        self.y = parent.y
-
-        if type(parent) == Planet:
-            self.speed_x, self.speed_y = 0, 0
-
-        else:
-            self.speed_x, self.speed_y = parent.speed_x, parent.speed_y
-
-        if type(parent) == Spaceship:
-            self.mass = 0
-
-        else:
-            self.mass = parent.mass
-
-        PhysicalObject.__init__(self, self.x, self.y, self.speed_x, self.speed_y)
-
-    def move(self, simulation_step, simulation_objects):
-        if type(self.parent) != Planet:
-            self.physical_move(simulation_step, planets=simulation_objects)
-
-
-from weapon import Bullet, Shell, Weapon
+from weapon import Weapon
 
 
 class Enemy(pygame.sprite.Sprite, PhysicalObject):
@@ -814,11 +687,9 @@ class Enemy(pygame.sprite.Sprite, PhysicalObject):
 
         self.angle = angle
 
-        self.or_image = load_image("space_railgun.png", -1)
-        self.or_image = pygame.transform.scale(self.or_image, (20, 50))
+        self.or_image = ASSETS.image("space_railgun.png", (20, 50), -1)
 
-        self.or_map_image = load_image("spaceship_on_map.png", -1)
-        self.or_map_image = pygame.transform.scale(self.or_map_image, (20, 20))
+        self.or_map_image = ASSETS.image("spaceship_on_map.png", (20, 20), -1)
 
         self.rect = self.or_image.get_rect()
         self.image = self.or_image
@@ -827,6 +698,7 @@ class Enemy(pygame.sprite.Sprite, PhysicalObject):
         self.rotation_speed = rotation_speed
         self.orbit_parent = orbit_parent
         self.hp = hp
+        self.collision_radius = 25
 
         self.weapon = Weapon('minigun_sprite.png', 'shell.png', life_span=500,
                              magazine_size=60,
@@ -838,12 +710,22 @@ class Enemy(pygame.sprite.Sprite, PhysicalObject):
         self.weapon.set_group(system.bullets)
 
         system.enemies_counter += 1
+        system.gravity_engine.add(self, parent=orbit_parent, rails=True)
         self.shoot_dist = 700
 
+        # filled by EnemyAI every frame
+        self.hit = None
+        self.hero_distance = 0
+        self.hero_bearing = 0
+        self.visible = True
+        self.elapsed = 0
+        self.last_think = 0
+
     def fire(self):
         self.weapon.fire()
 
     def destroy(self, system):
+        system.gravity_engine.remove(self)
         system.enemies_counter -= 1
         system.arrows_list[self].destroy()
         system.enemies_list.remove(self)
@@ -851,30 +733,37 @@ class Enemy(pygame.sprite.Sprite, PhysicalObject):
         del self
 
     def update(self, system):
-        dmg = pygame.sprite.spritecollideany(self, system.bullets)
-        if dmg and dmg.timer > dmg.spawn_no_damage:
-            self.hp -= dmg.damage
-            dmg.destroy()
+        if self.hit is not None:
+            self.hp -= system.bullets.damages[self.hit]
+            system.bullets.destroy(self.hit)
 
         if self.hp <= 0:
             self.destroy(system)
 
-        if not system.map_mode:
+        # visible is set for this frame before the enemy is drawn, so a culled enemy is moved off the screen
+        # and is not drawn at its last position when it comes back into view
+        if not self.visible:
+            self.rect.topleft = (-self.rect.width, -self.rect.height)
+
+        elif not system.map_mode:
             self.render_on_view(system.surface, system.hero)
 
         else:
-            self.render_on_map(system.surface)
+            self.render_on_map(system.surface, system.map_size)
 
-        if self.hero_distanse(system.hero) < self.shoot_dist:
-            if (self.angle + self.hero_angle(system.hero)) % 360 < 180:
-                self.angle = (self.angle - self.rotation_speed) % 360
+        # the hero is not watched while its predicted path stays far away;
+        # an enemy turns for all the ticks since it last thought, but not past the hero
+        if self.elapsed and self.hero_distance < self.shoot_dist and system.intercepts.awake(self, self.shoot_dist):
+            turn = (self.angle + self.hero_bearing) % 360
+            step = self.rotation_speed * self.elapsed
+            if turn < 180:
+                self.angle = (self.angle - min(step, turn)) % 360
 
             else:
-                self.angle = (self.angle + self.rotation_speed) % 360
+                self.angle = (self.angle + min(step, 360 - turn)) % 360
 
-        if self.hero_distanse(system.hero) < self.shoot_dist and -20 < (
-                self.angle + self.hero_angle(system.hero)) % 360 < 20:
-            self.fire()
+            if -20 < (self.angle + self.hero_bearing) % 360 < 20:
+                self.fire()
 
         if self.orbit_parent:
             self.physical_move(system.game_speed, planets=[self.orbit_parent])
@@ -882,8 +771,8 @@ class Enemy(pygame.sprite.Sprite, PhysicalObject):
         else:
             self.physical_move(system.game_speed, planets=system.objects)
 
-        if self.weapon:
-            self.weapon.update()
+        if self.weapon and self.elapsed:
+            self.weapon.update(self.elapsed)
 
     def render_on_view(self, surface, hero):
         self.rect.x, self.rect.y = self.blitRotate((self.x - hero.x + surface.get_width() // 2,
@@ -891,39 +780,16 @@ class Enemy(pygame.sprite.Sprite, PhysicalObject):
                                                    (self.or_image.get_width() // 2, self.or_image.get_height() // 2),
                                                    self.angle, self.or_image)
 
-    def render_on_map(self, surface):
-        self.rect.x, self.rect.y = self.blitRotate((surface.get_width() // 2 + self.x / MAP_SIZE,
-                                                    surface.get_height() // 2 + self.y / MAP_SIZE),
+    def render_on_map(self, surface, map_size=MAP_SIZE):
+        self.rect.x, self.rect.y = self.blitRotate((surface.get_width() // 2 + self.x / map_size,
+                                                    surface.get_height() // 2 + self.y / map_size),
                                                    (10, 10), self.angle + 45, self.or_map_image)
 
     def hero_distanse(self, hero):
         return int((hero.x - self.x) ** 2 + (hero.y - self.y) ** 2) ** 0.5
 
-    def hero_angle(self, hero):
-        hero_pos_angle = -math.degrees(math.atan2((hero.y - self.y), (hero.x - self.x)))
-        return hero_pos_angle
-
     def blitRotate(self, pos, originPos, angle, image):
-        angle = - angle - 90
-        # calcaulate the axis aligned bounding box of the rotated image
-        w, h = image.get_size()
-        box = [pygame.math.Vector2(p) for p in [(0, 0), (w, 0), (w, -h), (0, -h)]]
-        box_rotate = [p.rotate(angle) for p in box]
-        min_box = (min(box_rotate, key=lambda p: p[0])[0], min(box_rotate, key=lambda p: p[1])[1])
-        max_box = (max(box_rotate, key=lambda p: p[0])[0], max(box_rotate, key=lambda p: p[1])[1])
-
-        # calculate the translation of the pivot
-        pivot = pygame.math.Vector2(originPos[0], -originPos[1])
-        pivot_rotate = pivot.rotate(angle)
-        pivot_move = pivot_rotate - pivot
-
-        # calculate the upper left origin of the rotated image
-        origin = (
-            pos[0] - originPos[0] + min_box[0] - pivot_move[0], pos[1] - originPos[1] - max_box[1] + pivot_move[1])
-
-        # get a rotated image
-        self.image = pygame.transform.rotate(image, angle)
-
+        self.image, origin = blit_rotate(pos, originPos, angle, image)
         return origin
 
 
@@ -931,8 +797,7 @@ class LargeEnemy(Enemy):
     def __init__(self, group, system, x, y, angle, speed_x, speed_y, rotation_speed=1, orbit_parent=None, hp=50):
         Enemy.__init__(self, group, system, x, y, angle, speed_x, speed_y, rotation_speed=rotation_speed,
                        orbit_parent=orbit_parent, hp=hp)
-        self.or_image = load_image("space_gun.png", -1)
-        self.or_image = pygame.transform.scale(self.or_image, (70, 180))
+        self.or_image = ASSETS.image("space_gun.png", (70, 180), -1)
 
         self.rect = self.or_image.get_rect()
         self.image = self.or_image
@@ -941,6 +806,7 @@ class LargeEnemy(Enemy):
         self.rotation_speed = rotation_speed
         self.orbit_parent = orbit_parent
         self.hp = hp
+        self.collision_radius = 90
 
         self.weapon = Weapon('minigun_sprite.png', 'shell.png',
                              life_span=500,
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+# one candidate impulse: start in frames from now, angle in degrees like Spaceship.angle,
+# delta_v in units per second
+class Burn:
+    def __init__(self, start, angle, delta_v, score, closest_distance, closest_time, lowest_distance, path):
+        self.start = start
+        self.angle = angle
+        self.delta_v = delta_v
+        self.score = score
+
+        self.closest_distance = closest_distance
+        self.closest_time = closest_time
+        self.lowest_distance = lowest_distance
+        self.path = path
+
+
+# evaluates a grid of burns (start time x angle x delta-v) for one body in a single
+# vectorized propagation against planets and moons, moons come from the ephemeris
+class ManeuverPlanner:
+    def __init__(self, gravity_engine, ephemeris, planets, horizon=12000, step_size=20, record_every=10,
+                 safe_altitude=100):
+        self.gravity_engine = gravity_engine
+        self.ephemeris = ephemeris
+        self.planets = planets
+
+        self.horizon = horizon
+        self.step_size = step_size
+        self.record_every = record_every
+        self.safe_altitude = safe_altitude
+
+    def planet_paths(self, times):
+        paths = np.zeros((len(times), len(self.planets), 2))
+        moon_paths = None
+
+        for i, planet in enumerate(self.planets):
+            if planet.body in self.ephemeris.columns:
+                if moon_paths is None:
+                    moon_paths, moon_speeds = self.ephemeris.state(times)
+                paths[:, i] = moon_paths[:, self.ephemeris.columns[planet.body]]
+
+            else:
+                paths[:, i] = self.gravity_engine.positions[planet.body]
+
+        return paths
+
+    def target_path(self, target, frames):
+        gravity_engine = self.gravity_engine
+        parent = gravity_engine.parents[target]
+        if gravity_engine.rails[target] and not gravity_engine.rails[parent]:
+            positions, velocities = gravity_engine.rails_states(np.array([target]), frames)
+            return positions[:, 0]
+
+        shadow = gravity_engine.snapshot()
+        bodies = self.ephemeris.bodies + [target]
+        path = [shadow.positions[target].copy()]
+        for i in range(1, len(frames)):
+            shadow.pending[bodies] = True
+            shadow.step(frames[i] - frames[i - 1])
+            path.append(shadow.positions[target].copy())
+
+        return np.array(path)
+
+    def accelerations(self, positions, planet_positions, masses):
+        delta = positions[:, None, :] - planet_positions[None, :, :]
+        distance_2 = (delta ** 2).sum(axis=2)
+        factor = masses[None, :] / (distance_2 * np.sqrt(distance_2))
+        return -self.gravity_engine.gravity * (delta * factor[:, :, None]).sum(axis=1), np.sqrt(distance_2)
+
+    # best burns first: closest approach to target if it is given,
+    # otherwise the cheapest burns which keep the body above planets[0] with safe_altitude
+    def plan(self, body, angles, delta_vs, start_times, target=None, count=5):
+        gravity_engine = self.gravity_engine
+        fps = gravity_engine.fps
+
+        start, angle, delta_v = (grid.ravel() for grid in np.meshgrid(start_times, angles, delta_vs, indexing='ij'))
+        burn_steps = np.round(np.asarray(start, dtype=float) / self.step_size).astype(int)
+        impulses = np.stack((np.cos(np.radians(angle)), np.sin(np.radians(angle))), axis=-1) * delta_v[:, None]
+
+        steps = int(self.horizon // self.step_size)
+        frames = np.arange(steps + 1) * self.step_size
+        planet_paths = self.planet_paths(gravity_engine.time + frames)
+        target_path = self.target_path(target.body, frames) if target is not None else None
+
+        masses = np.array([planet.mass for planet in self.planets], dtype=float)
+        radii = np.array([planet.radius for planet in self.planets], dtype=float)
+
+        positions = np.repeat(gravity_engine.positions[body][None, :], len(start), axis=0)
+        velocities = np.repeat(gravity_engine.velocities[body][None, :], len(start), axis=0)
+
+        crashed = np.zeros(len(start), dtype=bool)
+        closest_distance = np.full(len(start), np.inf)
+        closest_time = np.zeros(len(start))
+        lowest_distance = np.full(len(start), np.inf)
+        path = [positions.copy()]
+
+        h = self.step_size
+        acceleration, distances = self.accelerations(positions, planet_paths[0], masses)
+        for i in range(steps + 1):
+            burned = burn_steps <= i
+            velocities[burn_steps == i] += impulses[burn_steps == i]
+
+            crashed |= (distances < radii[None, :]).any(axis=1)
+            lowest_distance[burned] = np.minimum(lowest_distance[burned], distances[burned, 0])
+
+            if target_path is not None:
+                distance = np.sqrt(((positions - target_path[i]) ** 2).sum(axis=1))
+                closer = distance < closest_distance
+                closest_distance[closer] = distance[closer]
+                closest_time[closer] = frames[i]
+
+            if i == steps:
+                break
+
+            # kick-drift-kick leapfrog like GravityEngine.step
+            velocities += acceleration * h / 2
+            positions += velocities / fps * h
+            acceleration, distances = self.accelerations(positions, planet_paths[i + 1], masses)
+            velocities += acceleration * h / 2
+
+            if not (i + 1) % self.record_every:
+                path.append(positions.copy())
+
+        path = np.array(path)
+
+        # burns which start after the horizon were not checked
+        crashed |= burn_steps > steps
+
+        if target is not None:
+            score = np.where(crashed, np.inf, closest_distance)
+
+        else:
+            safe = lowest_distance >= radii[0] + self.safe_altitude
+            score = np.where(crashed | ~safe, np.inf, delta_v - lowest_distance / (lowest_distance.max() + 1))
+
+        order = np.argsort(score, kind='stable')[:count]
+        return [Burn(start[i], angle[i], delta_v[i], score[i], closest_distance[i], closest_time[i],
+                     lowest_distance[i], path[:, i]) for i in order if np.isfinite(score[i])]
@@ -0,0 +1,314 @@
+import heapq
+import math
+import numpy as np
+from collisions import SpatialHash
+from gravity_field import GravityField
+from rotation import blit_rotate
+
+
+ARRAYS = ('positions', 'origins', 'velocities', 'spawn_times', 'spawn_ticks', 'angles', 'life_spans', 'damages',
+          'spawn_no_damage', 'radii', 'types', 'falling', 'alive', 'serials', 'solutions')
+
+
+# first moment (0..limit) when points p moving with w come within sqrt(radius_2) of the origin,
+# 0 if they are already inside, inf if never
+def first_contact(p, w, radius_2, limit=np.inf):
+    a = (w ** 2).sum(axis=-1)
+    b = 2 * (p * w).sum(axis=-1)
+    c = (p ** 2).sum(axis=-1) - radius_2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = (-b - np.sqrt(b ** 2 - 4 * a * c)) / (2 * a)
+
+    tau = np.where((tau >= 0) & (tau <= limit), tau, np.inf)
+    return np.where(c < 0, 0, tau)
+
+
+# struct-of-arrays storage for every bullet and shell of a planetary system,
+# kinds are projectile classes (Bullet, Shell) which only describe sprite, damage and physics;
+# bullets fly straight: their position is origin + velocity * game time since spawn, expiry and
+# planet impact are solved once and wait on heaps, shells are integrated every frame
+class ProjectileManager:
+    def __init__(self, gravity_engine, ephemeris, capacity=256, segment=20, segments=30):
+        self.gravity_engine = gravity_engine
+        self.ephemeris = ephemeris
+        self.gravity = gravity_engine.gravity
+        self.fps = gravity_engine.fps
+
+        # moons are taken as moving linearly for segment frames, impacts with them are
+        # solved segments * segment frames ahead and solved again after that
+        self.segment = segment
+        self.segments = segments
+
+        self.kinds = []
+        self.size = 0
+        self.free = []
+
+        # number of updates so far, timers and life spans are counted in them
+        self.ticks = 0
+        self.counter = 0
+
+        # (tick, serial, index) and (game time, solution, index, crash)
+        self.expiries = []
+        self.impacts = []
+        self.unsolved = []
+        self.revision = None
+
+        self.positions = np.zeros((capacity, 2))
+        self.origins = np.zeros((capacity, 2))
+        self.velocities = np.zeros((capacity, 2))
+        self.spawn_times = np.zeros(capacity)
+        self.spawn_ticks = np.zeros(capacity, dtype=int)
+        self.angles = np.zeros(capacity)
+        self.life_spans = np.zeros(capacity, dtype=int)
+        self.damages = np.zeros(capacity, dtype=int)
+        self.spawn_no_damage = np.zeros(capacity, dtype=int)
+        self.radii = np.zeros(capacity)
+        self.types = np.zeros(capacity, dtype=int)
+        self.falling = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.serials = np.zeros(capacity, dtype=int)
+        self.solutions = np.zeros(capacity, dtype=int)
+
+        # baked gravity of planets which do not move, moons are added exactly
+        self.field = GravityField(self.gravity)
+
+        # live projectiles by world cell, built at the end of every update
+        self.grid = SpatialHash()
+        self.max_radius = 0
+
+    def __len__(self):
+        return int(self.alive[:self.size].sum())
+
+    def grow(self):
+        capacity = len(self.alive) * 2
+        for name in ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def spawn(self, kind, x, y, angle, speed, speed_x=0, speed_y=0, life_span=1200):
+        if kind not in self.kinds:
+            self.kinds.append(kind)
+
+        if self.free:
+            index = self.free.pop()
+
+        else:
+            if self.size == len(self.alive):
+                self.grow()
+
+            index = self.size
+            self.size += 1
+
+        muzzle_speed = speed * kind.muzzle_factor
+        self.positions[index] = x, y
+        self.origins[index] = x, y
+        self.spawn_times[index] = self.gravity_engine.time
+        self.spawn_ticks[index] = self.ticks
+        self.velocities[index] = speed_x + muzzle_speed * math.cos(math.radians(angle)), \
+                                 speed_y + muzzle_speed * math.sin(math.radians(angle))
+        self.angles[index] = angle
+        self.life_spans[index] = life_span
+        self.damages[index] = kind.damage
+        self.spawn_no_damage[index] = kind.spawn_no_damage(speed)
+        self.radii[index] = kind.collision_radius
+        self.max_radius = max(self.max_radius, kind.collision_radius)
+        self.types[index] = self.kinds.index(kind)
+        self.falling[index] = kind.gravity
+        self.alive[index] = True
+
+        self.counter += 1
+        self.serials[index] = self.counter
+        heapq.heappush(self.expiries, (self.ticks + life_span + 1, self.counter, index))
+        if not kind.gravity:
+            self.unsolved.append(index)
+
+        return index
+
+    def destroy(self, indexes):
+        indexes = np.atleast_1d(indexes)
+        indexes = indexes[self.alive[indexes]]
+        self.alive[indexes] = False
+        self.free.extend(indexes.tolist())
+
+    def live(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def timers(self, indexes):
+        return self.ticks - self.spawn_ticks[indexes]
+
+    # pushes the first planet impact of straight bullets from the current game time,
+    # or a new solution at the end of the solved interval if moons could still be hit
+    def solve(self, indexes, planets):
+        if not len(indexes):
+            return None
+
+        start = self.gravity_engine.time
+        speeds = self.velocities[indexes] / self.fps
+        origins = self.origins[indexes] + speeds * (start - self.spawn_times[indexes])[:, None]
+        contact = np.full(len(indexes), np.inf)
+
+        moving = [planet for planet in planets if planet.body in self.ephemeris.columns]
+        static = [planet for planet in planets if planet.body not in self.ephemeris.columns]
+
+        if static:
+            centers = np.array([(planet.x, planet.y) for planet in static], dtype=float)
+            limits = np.array([planet.radius - planet.atmosphere_height for planet in static], dtype=float)
+            contact = first_contact(origins[:, None, :] - centers[None, :, :], speeds[:, None, :],
+                                    limits ** 2).min(axis=1)
+
+        if moving:
+            columns = [self.ephemeris.columns[planet.body] for planet in moving]
+            limits = np.array([planet.radius - planet.atmosphere_height for planet in moving], dtype=float)
+            offsets = np.arange(self.segments) * self.segment
+            moon_positions, moon_velocities = self.ephemeris.state(start + offsets)
+
+            # (segments, bullets, moons)
+            p = origins[None, :, None, :] + speeds[None, :, None, :] * offsets[:, None, None, None] - \
+                moon_positions[:, None, columns, :]
+            w = speeds[None, :, None, :] - moon_velocities[:, None, columns, :] / self.fps
+            tau = first_contact(p, w, limits ** 2, self.segment) + offsets[:, None, None]
+            contact = np.minimum(contact, tau.min(axis=(0, 2)))
+
+        for index, tau in zip(indexes.tolist(), contact.tolist()):
+            self.counter += 1
+            self.solutions[index] = self.counter
+            if tau < np.inf:
+                heapq.heappush(self.impacts, (start + tau, self.counter, index, True))
+
+            elif moving:
+                heapq.heappush(self.impacts, (start + self.segments * self.segment, self.counter, index, False))
+
+    def accelerations(self, positions, moons):
+        accelerations = self.field.sample(positions)
+        if moons:
+            centers = np.array([(moon.x, moon.y) for moon in moons], dtype=float)
+            masses = np.array([moon.mass for moon in moons], dtype=float)
+            delta = positions[:, None, :] - centers[None, :, :]
+            distance_2 = (delta ** 2).sum(axis=2)
+            factor = masses / (distance_2 * np.sqrt(distance_2))
+            accelerations -= self.gravity * (delta * factor[:, :, None]).sum(axis=1)
+
+        return accelerations
+
+    def update(self, system):
+        planets = system.planets
+        self.ticks += 1
+        now = self.gravity_engine.time + system.game_speed
+
+        # moons were pushed, every bullet has to be solved again
+        revision = self.gravity_engine.revisions[self.ephemeris.bodies].sum()
+        if revision != self.revision:
+            self.revision = revision
+            self.unsolved = self.live().tolist()
+
+        # slots may have been freed or given to a shell since
+        unsolved = np.unique(np.array(self.unsolved, dtype=int))
+        self.unsolved = []
+        self.solve(unsolved[self.alive[unsolved] & ~self.falling[unsolved]], planets)
+
+        while self.expiries and self.expiries[0][0] <= self.ticks:
+            tick, serial, index = heapq.heappop(self.expiries)
+            if self.alive[index] and self.serials[index] == serial:
+                self.destroy(index)
+
+        resolve = []
+        while self.impacts and self.impacts[0][0] <= now:
+            time, solution, index, crash = heapq.heappop(self.impacts)
+            if self.alive[index] and self.solutions[index] == solution:
+                if crash:
+                    self.destroy(index)
+
+                else:
+                    resolve.append(index)
+
+        self.unsolved.extend(resolve)
+
+        live = self.live()
+        straight = live[~self.falling[live]]
+        self.positions[straight] = self.origins[straight] + \
+            self.velocities[straight] / self.fps * (now - self.spawn_times[straight])[:, None]
+
+        falling = live[self.falling[live]]
+        centers = np.array([(planet.x, planet.y) for planet in planets], dtype=float).reshape(-1, 2)
+        limits = np.array([planet.radius - planet.atmosphere_height for planet in planets], dtype=float)
+
+        distance_2 = ((self.positions[falling, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        crashed = (distance_2 < limits ** 2).any(axis=1)
+        self.destroy(falling[crashed])
+        falling = falling[~crashed]
+        live = self.live()
+
+        h = system.game_speed
+
+        # massless shells: kick-drift-kick like GravityEngine.step, planets stand still during the frame
+        if len(falling):
+            static = [planet for planet in planets if planet.body not in self.ephemeris.columns]
+            moons = [planet for planet in planets if planet.body in self.ephemeris.columns]
+            self.field.bake([(planet.x, planet.y) for planet in static], [planet.mass for planet in static],
+                            max([planet.radius for planet in static], default=1),
+                            min([planet.radius - planet.atmosphere_height for planet in static], default=1))
+
+            self.velocities[falling] += self.accelerations(self.positions[falling], moons) * h / 2
+            self.positions[falling] += self.velocities[falling] / self.fps * h
+            self.velocities[falling] += self.accelerations(self.positions[falling], moons) * h / 2
+
+        self.grid.build(self.positions[live], live)
+
+    # index of a projectile which hits a circle, None if there is none;
+    # projectiles are harmless while their timer is not above min_timer (own spawn_no_damage by default),
+    # only projectiles from the grid cells around the circle are tested
+    def collide(self, x, y, radius, min_timer=None):
+        live = self.grid.query(x, y, radius + self.max_radius)
+        live = live[self.alive[live]]
+        distance_2 = ((self.positions[live] - (x, y)) ** 2).sum(axis=1)
+        armed = self.timers(live) > (self.spawn_no_damage[live] if min_timer is None else min_timer)
+        hits = live[(distance_2 < (radius + self.radii[live]) ** 2) & armed]
+
+        return int(hits[0]) if len(hits) else None
+
+    # collide for many circles at once: projectile index for every circle, -1 if it is not hit,
+    # one projectile hits only one of them
+    def collide_all(self, points, radii):
+        hits = np.full(len(points), -1)
+        if not len(points):
+            return hits
+
+        owners, live = self.grid.neighbours(points)
+        near = radii + self.max_radius <= self.grid.cell_size
+        valid = self.alive[live] & near[owners]
+        owners, live = owners[valid], live[valid]
+
+        distance_2 = ((self.positions[live] - points[owners]) ** 2).sum(axis=1)
+        armed = self.timers(live) > self.spawn_no_damage[live]
+        hit = (distance_2 < (radii[owners] + self.radii[live]) ** 2) & armed
+        hits[owners[hit]] = live[hit]
+
+        # circles too large for the neighbour cells
+        for i in np.flatnonzero(~near):
+            hit = self.collide(points[i, 0], points[i, 1], radii[i])
+            hits[i] = -1 if hit is None else hit
+
+        struck = np.flatnonzero(hits >= 0)
+        first = np.unique(hits[struck], return_index=True)[1]
+        repeated = np.ones(len(struck), dtype=bool)
+        repeated[first] = False
+        hits[struck[repeated]] = -1
+
+        return hits
+
+    # (image, position) pairs of the projectiles in the viewport for surface.blits
+    def drawable(self, viewport):
+        live = self.live()
+        visible = viewport.visible(self.positions[live], self.radii[live])
+        screen = viewport.to_screen(self.positions[live[visible]])
+
+        blits = []
+        for index, (x, y) in zip(live[visible], screen):
+            sprite = self.kinds[self.types[index]].sprite()
+            blits.append(blit_rotate((x, y), (sprite.get_width() // 2, sprite.get_height() // 2),
+                                     self.angles[index] - 90, sprite))
+
+        return blits
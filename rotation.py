@@ -0,0 +1,61 @@
+import collections
+import math
+import pygame
+
+
+# offset from the position of the pivot to the upper left corner of the image rotated
+# by angle (pygame.transform.rotate degrees) around the pivot (origin_pos inside the image)
+def rotation_offset(size, origin_pos, angle):
+    w, h = size
+    cos_a, sin_a = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+
+    # axis aligned bounding box of the rotated image (y axis up like pygame.math.Vector2.rotate)
+    box = [(x * cos_a - y * sin_a, x * sin_a + y * cos_a) for x, y in ((0, 0), (w, 0), (w, -h), (0, -h))]
+    min_x = min(x for x, y in box)
+    max_y = max(y for x, y in box)
+
+    # translation of the pivot
+    pivot_x, pivot_y = origin_pos[0], -origin_pos[1]
+    move_x = pivot_x * cos_a - pivot_y * sin_a - pivot_x
+    move_y = pivot_x * sin_a + pivot_y * cos_a - pivot_y
+
+    return -origin_pos[0] + min_x - move_x, -origin_pos[1] - max_y + move_y
+
+
+# rotated copies of source surfaces at angles rounded to step degrees together with their offsets,
+# filled lazily and shared by every rotating sprite, the least recently used copies are dropped
+# when they take more than max_bytes
+class RotationCache:
+    def __init__(self, step=1, max_bytes=64 * 2 ** 20):
+        self.step = step
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.images = collections.OrderedDict()
+
+    def rotate(self, image, origin_pos, angle):
+        angle = round(angle / self.step) * self.step % 360
+        key = (image, tuple(origin_pos), angle)
+
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+
+        rotated = pygame.transform.rotate(image, angle)
+        self.images[key] = rotated, rotation_offset(image.get_size(), origin_pos, angle)
+        self.bytes += rotated.get_width() * rotated.get_height() * rotated.get_bytesize()
+
+        while self.bytes > self.max_bytes and len(self.images) > 1:
+            old, (old_rotated, old_offset) = self.images.popitem(last=False)
+            self.bytes -= old_rotated.get_width() * old_rotated.get_height() * old_rotated.get_bytesize()
+
+        return self.images[key]
+
+
+ROTATIONS = RotationCache()
+
+
+# rotated image and the position of its upper left corner for the pivot at pos,
+# angle like in the blitRotate methods of sprites (the image is turned by - angle - 90)
+def blit_rotate(pos, origin_pos, angle, image):
+    rotated, (offset_x, offset_y) = ROTATIONS.rotate(image, origin_pos, - angle - 90)
+    return rotated, (pos[0] + offset_x, pos[1] + offset_y)
@@ -0,0 +1,62 @@
+import numpy as np
+import pygame
+
+# parallax speeds and layer tiles by (screen size, star count, layer count, parallax)
+STARFIELDS = dict()
+
+
+# stars split by luminosity into layers drawn once on screen sized colorkeyed tiles, built once for a screen size
+# and shared by all systems; the tiles are RLE accelerated, SDL keeps only the encoded runs after the first blit,
+# so a tile costs memory and blit time by its stars and not by its size
+def star_layers(size, count=100, layers=8, parallax=50000):
+    key = (tuple(size), count, layers, parallax)
+    if key not in STARFIELDS:
+        width, height = size
+        random = np.random.default_rng()
+        positions = random.integers(0, size, (count, 2))
+        luminosity = random.integers(50, 255, count)
+        sizes = random.integers(1, 3, count)
+
+        bands = np.linspace(50, 255, layers + 1)
+        layer = np.clip(np.searchsorted(bands, luminosity, side='right') - 1, 0, layers - 1)
+
+        tiles = []
+        for i in range(layers):
+            tile = pygame.Surface(size)
+            tile.fill('black')
+            stars = layer == i
+            for (x, y), star_luminosity, star_size in zip(positions[stars], luminosity[stars], sizes[stars]):
+                # stars near an edge are drawn on the opposite edge too, so the tile wraps without seams
+                for dx in (-width, 0, width):
+                    for dy in (-height, 0, height):
+                        if -star_size <= x + dx < width + star_size and -star_size <= y + dy < height + star_size:
+                            pygame.draw.circle(tile, (star_luminosity,) * 3, (x + dx, y + dy), star_size)
+
+            tile.set_colorkey('black', pygame.RLEACCEL)
+            tiles.append(tile)
+
+        STARFIELDS[key] = (bands[:-1] + bands[1:]) / 2 / parallax, tiles
+
+    return STARFIELDS[key]
+
+
+# background stars of one system: a layer moves with the parallax of its mean luminosity and is blitted
+# wrapped around the screen, so the cost depends on the number of layers and not on the number of stars
+class Starfield:
+    def __init__(self, size, count=100, layers=8, parallax=50000):
+        self.size = np.array(size, dtype=float)
+        self.speed, self.tiles = star_layers(size, count, layers, parallax)
+        self.offsets = np.zeros((layers, 2))
+
+    def move(self, speed_x, speed_y):
+        self.offsets = np.mod(self.offsets - np.outer(self.speed, (speed_x, speed_y)), self.size)
+
+    def draw(self, surface):
+        width, height = self.size
+        sequence = []
+        for tile, (x, y) in zip(self.tiles, self.offsets):
+            for left in (x - width, x):
+                for top in (y - height, y):
+                    sequence.append((tile, (int(left), int(top))))
+
+        surface.blits(sequence, doreturn=False)
@@ -0,0 +1,25 @@
+import collections
+
+
+# rendered strings by (font, text, antialias, color) with least recently used ones dropped over capacity,
+# so texts drawn every frame are rendered once and labels which change keep at most capacity surfaces
+class TextCache:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = collections.OrderedDict()
+
+    # same arguments as pygame.font.Font.render
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, color)
+        if key in self.surfaces:
+            self.surfaces.move_to_end(key)
+            return self.surfaces[key]
+
+        self.surfaces[key] = font.render(text, antialias, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+
+        return self.surfaces[key]
+
+
+TEXTS = TextCache()
@@ -0,0 +1,176 @@
+import threading
+import numpy as np
+
+
+# one background prediction, points are world positions of the target
+# taken every record_every steps
+class Prediction:
+    def __init__(self, gravity_engine, bodies, target, generation):
+        self.gravity_engine = gravity_engine
+        self.bodies = bodies
+        self.target = target
+        self.generation = generation
+
+        self.points = []
+        self.done = False
+
+
+# predicts the path of one body on a snapshot of the gravity engine in a background thread,
+# points are appended to prediction.points while they are computed; a gravity step holds the GIL
+# for most of its time, so workers only step while the frame loop is idle and never stall a frame
+# for longer than one step
+class TrajectoryPredictor:
+    def __init__(self, steps=2500, step_size=10, record_every=10):
+        self.steps = steps
+        self.step_size = step_size
+        self.record_every = record_every
+
+        # every new request makes older workers stop
+        self.generation = 0
+
+        # cleared while the frame loop computes a frame
+        self.idle = threading.Event()
+        self.idle.set()
+
+    def request(self, gravity_engine, bodies, target):
+        self.generation += 1
+        prediction = Prediction(gravity_engine.snapshot(), bodies, target, self.generation)
+        threading.Thread(target=self.run, args=(prediction,), daemon=True).start()
+
+        return prediction
+
+    def cancel(self):
+        self.generation += 1
+
+    def pause(self):
+        self.idle.clear()
+
+    def resume(self):
+        self.idle.set()
+
+    def run(self, prediction):
+        gravity_engine = prediction.gravity_engine
+        for step in range(1, self.steps + 1):
+            self.idle.wait()
+            if prediction.generation != self.generation:
+                return None
+
+            gravity_engine.pending[prediction.bodies] = True
+            gravity_engine.step(self.step_size)
+
+            if not step % self.record_every:
+                prediction.points.append(tuple(gravity_engine.positions[prediction.target]))
+
+        prediction.done = True
+
+
+# keeps the predicted path in a ring buffer: points already passed are dropped
+# and the tail is extended by a few steps every frame, the whole path is
+# predicted again (in the background) only when the bodies were pushed
+class RollingPredictor:
+    def __init__(self, predictor=None, steps_per_frame=20):
+        self.predictor = predictor or TrajectoryPredictor()
+        self.steps_per_frame = steps_per_frame
+
+        capacity = self.predictor.steps // self.predictor.record_every
+        self.times = np.zeros(capacity)
+        self.points = np.zeros((capacity, 2))
+        self.head = 0
+        self.count = 0
+
+        self.prediction = None
+        self.taken = 0
+        self.start_time = 0
+
+        # shadow engine which continues the finished prediction
+        self.gravity_engine = None
+        self.time = 0
+        self.steps = 0
+
+        self.revision = None
+        self.invalid = True
+
+        # number of full predictions started
+        self.resets = 0
+
+    def invalidate(self):
+        self.invalid = True
+
+    def reset(self, gravity_engine, bodies, target, now):
+        self.prediction = self.predictor.request(gravity_engine, bodies, target)
+        self.taken = 0
+        self.start_time = now
+
+        self.gravity_engine = None
+        self.time = now
+        self.steps = 0
+
+        self.head = 0
+        self.count = 0
+        self.invalid = False
+        self.resets += 1
+
+    def append(self, point_time, point):
+        index = (self.head + self.count) % len(self.times)
+        self.times[index] = point_time
+        self.points[index] = point
+        self.count += 1
+
+    def update(self, gravity_engine, bodies, target, now):
+        revision = gravity_engine.revisions[bodies].sum()
+        if revision != self.revision:
+            # wait until the bodies stop being pushed (e.g. engine burn is over)
+            self.revision = revision
+            self.predictor.cancel()
+            self.prediction = None
+            self.gravity_engine = None
+            self.count = 0
+            self.invalid = True
+
+        elif self.invalid or (self.prediction is None and self.time < now):
+            self.reset(gravity_engine, bodies, target, now)
+
+        while self.count and self.times[self.head] <= now:
+            self.head = (self.head + 1) % len(self.times)
+            self.count -= 1
+
+        if self.prediction is not None:
+            self.take_prediction()
+
+        elif self.gravity_engine is not None:
+            self.extend(bodies, target)
+
+    def take_prediction(self):
+        prediction = self.prediction
+        done = prediction.done
+        interval = self.predictor.record_every * self.predictor.step_size
+
+        for point in prediction.points[self.taken:]:
+            self.taken += 1
+            self.time = self.start_time + self.taken * interval
+            self.append(self.time, point)
+
+        if done:
+            self.gravity_engine = prediction.gravity_engine
+            self.prediction = None
+
+    def extend(self, bodies, target):
+        step_size = self.predictor.step_size
+        for i in range(self.steps_per_frame):
+            if self.count == len(self.times):
+                break
+
+            self.gravity_engine.pending[bodies] = True
+            self.gravity_engine.step(step_size)
+            self.time += step_size
+            self.steps += 1
+
+            if not self.steps % self.predictor.record_every:
+                self.append(self.time, self.gravity_engine.positions[target])
+
+    def path(self):
+        return self.points[(self.head + np.arange(self.count)) % len(self.times)]
+
+    def timed_path(self):
+        indexes = (self.head + np.arange(self.count)) % len(self.times)
+        return self.times[indexes], self.points[indexes]
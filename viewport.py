@@ -0,0 +1,38 @@
+import numpy as np
+
+
+# world rectangle seen by the camera: centered on the hero in the view mode,
+# on the system center with scale map_size in the map mode; extents are world half sizes,
+# margin is in screen pixels
+class Viewport:
+    def __init__(self, margin=50):
+        self.margin = margin
+        self.left = 0
+        self.top = 0
+        self.width = 0
+        self.height = 0
+        self.scale = 1
+
+    def update(self, surface, hero, map_mode, map_size):
+        self.width, self.height = surface.get_size()
+        if map_mode:
+            self.scale = map_size
+            self.left, self.top = -(self.width // 2) * map_size, -(self.height // 2) * map_size
+
+        else:
+            self.scale = 1
+            self.left, self.top = hero.x - self.width // 2, hero.y - self.height // 2
+
+    def to_screen(self, positions):
+        return (np.asarray(positions, dtype=float) - (self.left, self.top)) / self.scale
+
+    def visible(self, positions, extents):
+        screen = self.to_screen(positions).reshape(-1, 2)
+        extents = np.asarray(extents, dtype=float) / self.scale + self.margin
+        return (screen[:, 0] > -extents) & (screen[:, 0] < self.width + extents) & \
+               (screen[:, 1] > -extents) & (screen[:, 1] < self.height + extents)
+
+    def contains(self, x, y, extent=0):
+        screen_x, screen_y = (x - self.left) / self.scale, (y - self.top) / self.scale
+        extent = extent / self.scale + self.margin
+        return -extent < screen_x < self.width + extent and -extent < screen_y < self.height + extent